@@ -1,15 +1,25 @@
+# Started before the other imports so the startup report covers them
+from startup import StartupTimer
+startup = StartupTimer()
+
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import joblib
 import numpy as np
-import pandas as pd
 import os
 from datetime import datetime
+import json
 import logging
 from pythonjsonlogger import jsonlogger
 import traceback
-import requests
+import threading
+import time
+import warnings
+from collections import namedtuple
 from pathlib import Path
+from features import FeatureVectorBuilder, map_features
+from compiled_model import CompiledTreeEnsemble, compile_model
+from memory_stats import process_memory
 
 # Configure logging
 logger = logging.getLogger()
@@ -18,22 +28,63 @@ formatter = jsonlogger.JsonFormatter()
 logHandler.setFormatter(formatter)
 logger.addHandler(logHandler)
 logger.setLevel(logging.INFO)
+startup.mark('imports')
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
 # Get the absolute path to the models directory
 MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
-MODEL_PATH = os.path.join(MODELS_DIR, 'best_model_20250420_000125.joblib')
 
-# Global variables for model and feature names
-model = None
-feature_names = None
+# Manifest written by the training scripts (scripts/model_registry.py)
+REGISTRY_PATH = os.path.join(MODELS_DIR, 'registry.json')
+# Served when there is no registry, e.g. a models directory copied by hand
+FALLBACK_MODEL_PATH = os.path.join(MODELS_DIR, 'best_model_20250420_000125.joblib')
+
+def registry_model_path(default=FALLBACK_MODEL_PATH):
+    """Production model named by the registry manifest, or default without one"""
+    try:
+        with open(REGISTRY_PATH) as f:
+            manifest = json.load(f)
+        version = manifest.get('production')
+        if version is None:
+            return default
+        return os.path.join(MODELS_DIR, manifest['versions'][version]['path'])
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable model registry {REGISTRY_PATH}: {str(e)}")
+        return default
+
+MODEL_PATH = registry_model_path()
+
+# How request JSON becomes model input: 'dataframe' builds a one-row
+# DataFrame, 'vector' fills a preallocated NumPy row via FeatureVectorBuilder
+FEATURE_BUILDER = os.getenv('FEATURE_BUILDER', 'dataframe').lower()
+
+# Swap tree ensembles for their compiled array form (same predictions, lower latency)
+COMPILED_MODEL = os.getenv('COMPILED_MODEL', 'false').lower() in ('1', 'true', 'yes')
+
+# Memory-map the model's arrays read-only so all gunicorn workers share one
+# copy. Tree ensembles are served from a compiled copy cached next to the model.
+MODEL_MMAP = os.getenv('MODEL_MMAP', 'false').lower() in ('1', 'true', 'yes')
+
+# Seconds between checks for a replaced model file (0 disables hot reload by file watch)
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', '0'))
+
+# Everything a request needs from the loaded model. Replaced as a whole on
+# reload, so each request sees one consistent model and feature layout.
+ModelState = namedtuple('ModelState', ['model', 'feature_names', 'feature_builder', 'path', 'signature'])
+
+# Model currently being served
+serving = ModelState(None, None, None, MODEL_PATH, None)
+_reload_lock = threading.Lock()
 
 def download_model_if_needed():
     """Download model from GitHub if not present"""
     model_path = Path('models/best_model.joblib')
     if not model_path.exists():
+        import requests
         logger.info("Model not found locally, downloading...")
         # Replace with your GitHub raw URL
         model_url = os.getenv('MODEL_URL', 'https://raw.githubusercontent.com/yourusername/your-repo/main/models/best_model.joblib')
@@ -46,32 +97,171 @@ def download_model_if_needed():
         else:
             logger.error(f"Failed to download model: {response.status_code}")
 
-def load_model():
+def load_model(model_path=MODEL_PATH, mmap_mode=None):
     """Load the trained model from disk"""
     try:
         if not os.path.exists(MODELS_DIR):
             logger.error(f"Models directory not found at: {MODELS_DIR}")
             raise FileNotFoundError(f"Models directory not found at: {MODELS_DIR}")
         
-        if not os.path.exists(MODEL_PATH):
-            logger.error(f"Model file not found at: {MODEL_PATH}")
-            raise FileNotFoundError(f"Model file not found at: {MODEL_PATH}")
+        if not os.path.exists(model_path):
+            logger.error(f"Model file not found at: {model_path}")
+            raise FileNotFoundError(f"Model file not found at: {model_path}")
         
-        model_data = joblib.load(MODEL_PATH)
+        model_data = joblib.load(model_path, mmap_mode=mmap_mode)
         logger.info("Model loaded successfully")
         return model_data['model'], model_data['feature_names']
     except Exception as e:
         logger.error(f"Error loading model: {str(e)}", exc_info=True)
         raise
 
+def file_signature(path):
+    """Identity of a file's current contents, changed by any replace or rewrite"""
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def compiled_cache_path(model_path):
+    """Where the memory-mappable compiled copy of a model is kept"""
+    return os.path.splitext(model_path)[0] + '.compiled.joblib'
+
+def load_mmap_model(model_path):
+    """
+    Load a model with its arrays memory-mapped read-only
+
+    sklearn copies tree nodes into private memory when unpickling, so tree
+    ensembles are compiled once into plain NumPy arrays and saved
+    uncompressed next to the model; every process then maps the same file.
+    Other models are mapped as stored, which only shares their arrays when
+    the artifact was saved without compression.
+    """
+    signature = file_signature(model_path)
+    cache_path = compiled_cache_path(model_path)
+    if os.path.exists(cache_path):
+        try:
+            cached = joblib.load(cache_path, mmap_mode='r')
+            if cached.get('source_signature') == signature:
+                logger.info(f"Memory-mapped compiled model from {cache_path}")
+                return cached['model'], cached['feature_names']
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable compiled model cache: {str(e)}")
+
+    model, feature_names = load_model(model_path)
+    try:
+        compiled = compile_model(model)
+    except TypeError as e:
+        logger.warning(f"Model not compiled, memory-mapping it as stored: {str(e)}")
+        return load_model(model_path, mmap_mode='r')
+
+    try:
+        # Write under a unique name, then rename, so concurrent workers never
+        # map a half-written cache
+        temp_path = f'{cache_path}.{os.getpid()}.tmp'
+        joblib.dump({
+            'model': compiled,
+            # A plain list, so loading the cache doesn't need pandas
+            'feature_names': list(feature_names),
+            'source_signature': signature
+        }, temp_path)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write compiled model cache, serving it unshared: {str(e)}")
+        return compiled, feature_names
+
+    cached = joblib.load(cache_path, mmap_mode='r')
+    logger.info(f"Compiled model cached at {cache_path} and memory-mapped")
+    return cached['model'], cached['feature_names']
+
+def prepare_model(model_path=MODEL_PATH):
+    """Load, compile and warm up a model without touching the one being served"""
+    signature = file_signature(model_path) if os.path.exists(model_path) else None
+    if MODEL_MMAP:
+        model, feature_names = load_mmap_model(model_path)
+    else:
+        model, feature_names = load_model(model_path)
+    startup.mark('model_load')
+
+    if COMPILED_MODEL and not isinstance(model, CompiledTreeEnsemble):
+        try:
+            model = compile_model(model)
+        except TypeError as e:
+            logger.warning(f"Model not compiled: {str(e)}")
+        startup.mark('compile')
+
+    feature_builder = None
+    if FEATURE_BUILDER == 'vector':
+        feature_builder = FeatureVectorBuilder(feature_names)
+        warmup_input = np.zeros((1, len(feature_names)))
+    else:
+        import pandas as pd
+        warmup_input = pd.DataFrame([dict.fromkeys(feature_names, 0)])
+
+    # Pay one-off costs (lazy imports, allocations) before serving traffic
+    model.predict(warmup_input)
+    startup.mark('warmup')
+    return ModelState(model, feature_names, feature_builder, model_path, signature)
+
+def reload_model(model_path=None):
+    """Load a model in the calling thread, then atomically swap it in"""
+    global serving
+    with _reload_lock:
+        state = prepare_model(model_path or serving.path)
+        serving = state
+    logger.info(f"Now serving model {state.path}")
+    return state
+
+def watch_model_file(interval):
+    """
+    Hot-reload the served model whenever its file is replaced or the
+    registry promotes another version
+    
+    A model loaded through /admin/reload keeps serving until the registry's
+    production pointer moves again.
+    """
+    rejected = None
+    promoted = registry_model_path(default=None)
+    while True:
+        time.sleep(interval)
+        path = serving.path
+        production = registry_model_path(default=None)
+        if production is not None and production != promoted:
+            promoted = path = production
+        if not os.path.exists(path):
+            continue
+        signature = file_signature(path)
+        if (path == serving.path and signature == serving.signature) or (path, signature) == rejected:
+            continue
+        try:
+            reload_model(path)
+        except Exception as e:
+            # Keep serving the current model; retry only once the file changes again
+            rejected = (path, signature)
+            logger.error(f"Model reload failed, keeping current model: {str(e)}")
+
+if FEATURE_BUILDER == 'vector':
+    # The pipeline was fitted on a DataFrame; a plain row in the same
+    # column order is equivalent, so the per-call warning is just noise
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
 # Load model at startup
 try:
-    model, feature_names = load_model()
+    serving = prepare_model(MODEL_PATH)
     logger.info("Model loaded successfully at startup")
 except Exception as e:
     logger.error(f"Could not load model. Error: {str(e)}")
-    model = None
-    feature_names = None
+startup.finish()
+logger.info(f"Startup took {startup.total * 1000:.0f} ms: {startup.report()['phases_ms']}")
+
+def start_model_watcher():
+    """Start the model file watcher thread in this process, if enabled"""
+    if MODEL_WATCH_INTERVAL > 0:
+        threading.Thread(
+            target=watch_model_file, args=(MODEL_WATCH_INTERVAL,), name='model-watcher', daemon=True
+        ).start()
+
+# When gunicorn preloads the app, gunicorn.conf.py starts the watcher in
+# each worker after the fork instead
+if not os.getenv('MODEL_WATCHER_AFTER_FORK'):
+    start_model_watcher()
 
 @app.route('/')
 def root():
@@ -91,35 +281,58 @@ def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'model_loaded': model is not None,
+        'model_loaded': serving.model is not None,
+        'model_path': os.path.basename(serving.path),
+        'feature_builder': 'vector' if serving.feature_builder is not None else 'dataframe',
+        'compiled_model': isinstance(serving.model, CompiledTreeEnsemble),
+        'memory_mapped': MODEL_MMAP,
+        'startup': startup.report(),
         'timestamp': datetime.now().isoformat(),
         'environment': os.getenv('FLASK_ENV', 'production')
     })
 
-# Feature name mapping from API input to model features
-FEATURE_MAPPING = {
-    'bedrooms': 'number of bedrooms',
-    'bathrooms': 'number of bathrooms',
-    'sqft_living': 'living area',
-    'sqft_lot': 'lot area',
-    'floors': 'number of floors',
-    'waterfront': 'waterfront present',
-    'view': 'number of views',
-    'condition': 'condition of the house',
-    'grade': 'grade of the house',
-    'sqft_above': 'Area of the house(excluding basement)',
-    'sqft_basement': 'Area of the basement',
-    'yr_built': 'Built Year',
-    'yr_renovated': 'Renovation Year',
-    'zipcode': 'Postal Code',
-    'sqft_living15': 'living_area_renov',
-    'sqft_lot15': 'lot_area_renov'
-}
+@app.route('/memory', methods=['GET'])
+def memory():
+    """Resident, shared and private memory of the worker serving this request"""
+    return jsonify(process_memory())
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Load a model file from the models directory and atomically swap it in"""
+    token = os.getenv('ADMIN_TOKEN')
+    if not token:
+        return jsonify({'error': 'Admin endpoints are disabled'}), 403
+    if request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Invalid admin token'}), 401
+
+    data = request.get_json(silent=True) or {}
+    model_path = None
+    if data.get('model_file'):
+        model_path = os.path.abspath(os.path.join(MODELS_DIR, data['model_file']))
+        if os.path.dirname(model_path) != os.path.abspath(MODELS_DIR):
+            return jsonify({'error': 'model_file must be a file in the models directory'}), 400
+
+    try:
+        state = reload_model(model_path)
+    except Exception as e:
+        logger.error(f"Model reload failed: {str(e)}", exc_info=True)
+        return jsonify({
+            'error': 'Reload failed',
+            'message': str(e)
+        }), 500
+
+    return jsonify({
+        'status': 'reloaded',
+        'model_path': os.path.basename(state.path),
+        'timestamp': datetime.now().isoformat()
+    })
 
 @app.route('/predict', methods=['POST'])
 def predict():
     """Make predictions using the loaded model"""
-    if model is None or feature_names is None:
+    # Use one model for the whole request, even if a reload swaps it meanwhile
+    state = serving
+    if state.model is None or state.feature_names is None:
         return jsonify({
             'error': 'Model not loaded',
             'message': 'The prediction model is not available'
@@ -133,21 +346,16 @@ def predict():
                 'message': 'Please provide input data in JSON format'
             }), 400
 
-        # Map input features to model features
-        mapped_data = {}
-        for api_name, model_name in FEATURE_MAPPING.items():
-            if api_name in data:
-                mapped_data[model_name] = data[api_name]
-
-        # Add default values for missing features
-        mapped_data['Number of schools nearby'] = data.get('schools_nearby', 5)  # Default value
-        mapped_data['Distance from the airport'] = data.get('airport_distance', 10.5)  # Default value
-
-        # Convert input data to DataFrame
-        input_data = pd.DataFrame([mapped_data])
+        if state.feature_builder is not None:
+            # Map input features straight into a model-ordered NumPy row
+            input_data = state.feature_builder.build(data)
+        else:
+            # Map input features to model features, then convert to DataFrame
+            import pandas as pd
+            input_data = pd.DataFrame([map_features(data)])
         
         # Make prediction
-        prediction = model.predict(input_data)
+        prediction = state.model.predict(input_data)
         
         return jsonify({
             'prediction': float(prediction[0]),
@@ -162,5 +370,13 @@ def predict():
         }), 500
 
 if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Run the EstateIQ prediction API')
+    parser.add_argument('--startup-report', action='store_true',
+                        help='Print how long each startup phase took and exit')
+    if parser.parse_args().startup_report:
+        print(startup.format())
+        raise SystemExit(0)
+
     port = int(os.getenv('PORT', 8000))  # Default to 8000 if PORT not set
     app.run(host='0.0.0.0', port=port)  # Bind to all interfaces 
\ No newline at end of file
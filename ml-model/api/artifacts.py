@@ -0,0 +1,225 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+from compiled_model import CompiledTreeEnsemble, compile_model
+from memory_stats import process_memory
+
+# Largest prediction change accepted from float32 downcasting, relative to
+# the mean absolute prediction
+FLOAT32_TOLERANCE = 1e-5
+
+# Rows of the check data the float32 model is compared on
+CHECK_ROWS = 10000
+
+
+def parse_compression(spec):
+    """
+    joblib compress argument for 'none', 'zlib:<level>' or 'lz4:<level>'
+
+    scripts/train_models.py has a copy, as it cannot import this module;
+    keep the two in step.
+
+    Raises:
+        ValueError: For an unknown method, or lz4 without the lz4 package
+    """
+    method, _, level = spec.partition(':')
+    if method == 'none':
+        return 0
+    if method not in ('zlib', 'lz4'):
+        raise ValueError(f"Unknown compression {spec!r}, expected none, zlib:<level> or lz4:<level>")
+    if method == 'lz4':
+        try:
+            import lz4.frame  # noqa: F401
+        except ImportError:
+            raise ValueError("lz4 compression needs the lz4 package (pip install lz4)")
+    return (method, int(level or 3))
+
+
+def float32_model(model, X_check, tolerance=FLOAT32_TOLERANCE):
+    """
+    Compile a tree ensemble and downcast it to float32, checking its accuracy
+
+    Args:
+        model: Fitted tree ensemble (see compile_model) or CompiledTreeEnsemble
+        X_check: Rows to compare predictions on
+        tolerance (float): Largest accepted prediction change, relative to
+            the mean absolute prediction
+
+    Returns:
+        tuple: (float32 CompiledTreeEnsemble, relative error)
+
+    Raises:
+        TypeError: If the model cannot be compiled
+        ValueError: If the predictions change by more than tolerance
+    """
+    compiled = model if isinstance(model, CompiledTreeEnsemble) else compile_model(model)
+    downcast = compiled.to_float32()
+    reference = model.predict(X_check)
+    error = float(np.max(np.abs(downcast.predict(X_check) - reference)) / np.mean(np.abs(reference)))
+    if error > tolerance:
+        raise ValueError(f"float32 model changes predictions by {error:.2e}, more than {tolerance:.0e}")
+    return downcast, error
+
+
+def save_artifact(model_data, path, compression='zlib:3', float32=False, X_check=None,
+                  tolerance=FLOAT32_TOLERANCE):
+    """
+    Write a {'model', 'feature_names', ...} artifact
+
+    The file is written under a temporary name and renamed into place. With
+    float32, the model is stored as a float32 CompiledTreeEnsemble, which the
+    API serves like any other model, once its predictions on X_check are
+    within tolerance of the original's.
+
+    Args:
+        model_data (dict): Artifact to save
+        path (str): Output file
+        compression (str): 'none', 'zlib:<level>' or 'lz4:<level>'
+        float32 (bool): Store the model compiled with float32 arrays
+        X_check: Rows for the float32 accuracy check, required with float32
+
+    Returns:
+        dict: compression, float32, relative error (None without float32),
+            size_mb and write_seconds
+    """
+    compress = parse_compression(compression)
+    error = None
+    if float32:
+        if X_check is None:
+            raise ValueError("float32 artifacts need rows to check the downcast model on")
+        model, error = float32_model(model_data['model'], X_check, tolerance)
+        model_data = dict(model_data, model=model, float32_max_error=error)
+
+    start = time.perf_counter()
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    joblib.dump(model_data, temp_path, compress=compress)
+    os.replace(temp_path, path)
+    return {
+        'compression': compression,
+        'float32': float32,
+        'error': error,
+        'size_mb': os.path.getsize(path) / (1024 * 1024),
+        'write_seconds': time.perf_counter() - start
+    }
+
+
+def _rss_mb():
+    memory = process_memory()
+    # Peak RSS where /proc is not available, None where neither is (Windows)
+    return memory.get('rss_mb', memory.get('max_rss_mb'))
+
+
+def _load_in_child(path, queue):
+    before = _rss_mb()
+    start = time.perf_counter()
+    model_data = joblib.load(path)
+    seconds = time.perf_counter() - start
+    after = _rss_mb()
+    queue.put((seconds, after - before if before is not None else None))
+    del model_data
+
+
+def measure_load(path):
+    """
+    Load time and resident memory added by loading an artifact
+
+    Measured in a fresh process, so nothing is already imported or cached
+    in memory except the file itself in the page cache.
+
+    Returns:
+        tuple: (seconds, RSS increase in MB, or None where memory cannot
+            be measured)
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    child = context.Process(target=_load_in_child, args=(path, queue))
+    child.start()
+    result = queue.get()
+    child.join()
+    return result
+
+
+def compare_options(model_path, X_check, options, tolerance=FLOAT32_TOLERANCE):
+    """
+    Write the artifact once per compression and precision option and measure it
+
+    Returns:
+        list: One report per option that could be written, as returned by
+            save_artifact plus load_seconds and load_rss_mb
+    """
+    model_data = joblib.load(model_path)
+    reports = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for compression in options:
+            try:
+                parse_compression(compression)
+            except ValueError as e:
+                print(f"Skipping {compression}: {str(e)}")
+                continue
+            for float32 in (False, True):
+                path = os.path.join(temp_dir, 'artifact.joblib')
+                try:
+                    report = save_artifact(model_data, path, compression, float32, X_check, tolerance)
+                except (TypeError, ValueError) as e:
+                    print(f"Skipping {compression}{', float32' if float32 else ''}: {str(e)}")
+                    continue
+                # Load once to bring the file into the page cache, so every
+                # option is timed the same way
+                joblib.load(path)
+                report['load_seconds'], report['load_rss_mb'] = measure_load(path)
+                reports.append(report)
+                os.remove(path)
+    return reports
+
+
+def load_check_rows(data_path, feature_names, n_rows=CHECK_ROWS):
+    """Feature rows of a CSV for the float32 accuracy check"""
+    import pandas as pd
+    from batch_score import build_features
+
+    chunk = pd.read_csv(data_path, nrows=n_rows)
+    features, complete = build_features(chunk, list(feature_names))
+    return features[complete]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rewrite a model artifact compressed and/or with float32 tree arrays, "
+                    "or compare size, load time and memory of the options"
+    )
+    parser.add_argument('model_path', help="{'model', 'feature_names'} artifact")
+    parser.add_argument('data_path', help="CSV to check float32 predictions on (API or model column names)")
+    parser.add_argument('--output', help="Write the artifact with --compression/--float32 instead of comparing")
+    parser.add_argument('--compression', default='zlib:3', help="none, zlib:<level> or lz4:<level>")
+    parser.add_argument('--float32', action='store_true', help="Store the model compiled with float32 arrays")
+    parser.add_argument('--options', nargs='+', default=['none', 'zlib:1', 'zlib:3', 'zlib:9', 'lz4:3'],
+                        help="Compression options to compare")
+    parser.add_argument('--tolerance', type=float, default=FLOAT32_TOLERANCE,
+                        help="Largest float32 prediction change, relative to the mean prediction")
+    args = parser.parse_args()
+
+    feature_names = joblib.load(args.model_path)['feature_names']
+    X_check = load_check_rows(args.data_path, feature_names)
+
+    if args.output:
+        report = save_artifact(joblib.load(args.model_path), args.output, args.compression,
+                               args.float32, X_check, args.tolerance)
+        print(f"Saved {args.output}: {report['size_mb']:.2f} MB"
+              + (f", float32 error {report['error']:.2e}" if args.float32 else ''))
+        raise SystemExit(0)
+
+    source_mb = os.path.getsize(args.model_path) / (1024 * 1024)
+    print(f"{args.model_path}: {source_mb:.2f} MB")
+    print(f"{'compression':<12} {'float32':>8} {'size MB':>9} {'write s':>8} {'load s':>7} "
+          f"{'load RSS MB':>12} {'error':>9}")
+    for r in compare_options(args.model_path, X_check, args.options, args.tolerance):
+        error = f"{r['error']:.2e}" if r['error'] is not None else '-'
+        load_rss = f"{r['load_rss_mb']:.1f}" if r['load_rss_mb'] is not None else '-'
+        print(f"{r['compression']:<12} {str(r['float32']):>8} {r['size_mb']:>9.2f} {r['write_seconds']:>8.2f} "
+              f"{r['load_seconds']:>7.2f} {load_rss:>12} {error:>9}")
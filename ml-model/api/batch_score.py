@@ -0,0 +1,171 @@
+import argparse
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from features import DEFAULT_FEATURES, FEATURE_MAPPING
+
+
+def load_artifact(model_path, compiled=False):
+    """Load a {'model', 'feature_names'} artifact, optionally compiling the model"""
+    model_data = joblib.load(model_path)
+    model = model_data['model']
+    if compiled:
+        from compiled_model import compile_model
+        try:
+            model = compile_model(model)
+        except TypeError as e:
+            print(f"Model not compiled: {str(e)}")
+    return model, list(model_data['feature_names'])
+
+
+def build_features(chunk, feature_names):
+    """
+    Model input for one chunk of the input file
+
+    Columns may use the API names from FEATURE_MAPPING or the model feature
+    names directly. Optional inputs missing from the file get their defaults.
+
+    Returns:
+        tuple: (features DataFrame in model column order, mask of rows with
+            every feature present and numeric)
+    """
+    columns = {}
+    for api_name, model_name in FEATURE_MAPPING.items():
+        if api_name in chunk.columns:
+            columns[model_name] = chunk[api_name]
+    for api_name, (model_name, default) in DEFAULT_FEATURES.items():
+        if api_name in chunk.columns:
+            columns[model_name] = chunk[api_name].fillna(default)
+        elif model_name not in chunk.columns:
+            columns[model_name] = pd.Series(default, index=chunk.index)
+
+    missing = []
+    features = {}
+    for name in feature_names:
+        source = columns.get(name, chunk.get(name))
+        if source is None:
+            missing.append(name)
+            continue
+        features[name] = pd.to_numeric(source, errors='coerce')
+    if missing:
+        raise ValueError(f"Input file has no column for model features: {missing}")
+
+    features = pd.DataFrame(features, index=chunk.index)
+    return features, features.notna().all(axis=1).to_numpy()
+
+
+class OutputWriter:
+    """Append scored chunks to a CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.lower().endswith(('.parquet', '.pq'))
+        self._writer = None
+        self._header = True
+
+    def write(self, chunk):
+        if not self.parquet:
+            chunk.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+            self._header = False
+            return
+
+        # Imported here: only needed for Parquet output
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        # A later chunk may have missing values in a column that was all
+        # integers so far; store integers as floats so every chunk fits one schema
+        ints = chunk.select_dtypes(include='integer').columns
+        table = pa.Table.from_pandas(chunk.astype({col: 'float64' for col in ints}), preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, or None without the resource module"""
+    if resource is None:
+        return None
+    # ru_maxrss is in kB on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def score_file(model_path, input_path, output_path, chunksize=50000, compiled=False):
+    """
+    Score a CSV file chunk by chunk, streaming predictions to the output
+
+    Memory use depends on chunksize, not on the size of the input file.
+    Rows with a missing or non-numeric feature get an empty prediction.
+
+    Args:
+        model_path (str): joblib artifact with 'model' and 'feature_names'
+        input_path (str): CSV to score
+        output_path (str): .csv, or .parquet (requires pyarrow)
+        chunksize (int): Rows read, scored and written at a time
+        compiled (bool): Predict with the compiled tree ensemble
+
+    Returns:
+        dict: Rows scored and skipped, seconds, rows/sec and peak RSS in MB
+    """
+    model, feature_names = load_artifact(model_path, compiled)
+
+    start = time.perf_counter()
+    rows = skipped = 0
+    writer = OutputWriter(output_path)
+    try:
+        for chunk in pd.read_csv(input_path, chunksize=chunksize):
+            features, valid = build_features(chunk, feature_names)
+            predictions = np.full(len(chunk), np.nan)
+            if valid.any():
+                predictions[valid] = model.predict(features[valid])
+            chunk['prediction'] = predictions
+            writer.write(chunk)
+
+            rows += len(chunk)
+            skipped += int((~valid).sum())
+            print(f"Scored {rows} rows", file=sys.stderr)
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    peak_rss = peak_rss_mb()
+    return {
+        'rows': rows,
+        'skipped': skipped,
+        'seconds': round(seconds, 2),
+        'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else 0.0,
+        'peak_rss_mb': round(peak_rss, 1) if peak_rss is not None else None
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a large CSV file in chunks with a saved model")
+    parser.add_argument('model_path', help="joblib artifact with 'model' and 'feature_names'")
+    parser.add_argument('input_path', help="CSV with API or model feature columns")
+    parser.add_argument('output_path', help="Output .csv or .parquet file")
+    parser.add_argument('--chunksize', type=int, default=50000, help="Rows per chunk")
+    parser.add_argument('--compiled', action='store_true', help="Predict with the compiled tree ensemble")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.input_path) == os.path.abspath(args.output_path):
+        parser.error("output_path must differ from input_path")
+
+    report = score_file(args.model_path, args.input_path, args.output_path, args.chunksize, args.compiled)
+    print(f"Rows scored: {report['rows']} ({report['skipped']} skipped for missing features)")
+    print(f"Time: {report['seconds']:.2f} s ({report['rows_per_sec']:.0f} rows/sec)")
+    if report['peak_rss_mb'] is not None:
+        print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB")
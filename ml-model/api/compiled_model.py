@@ -0,0 +1,407 @@
+# Canonical version of ml/src/compiled_model.py: ml-model/api and ml/src are
+# deployed separately, each from its own directory with flat imports, so
+# they share no package to import one module from. Make changes here first,
+# then port them to the copy.
+
+import copy
+import json
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# XGBoost objectives whose prediction is the raw margin (no link function)
+XGB_IDENTITY_OBJECTIVES = {
+    'reg:squarederror',
+    'reg:pseudohubererror',
+    'reg:absoluteerror',
+    'reg:quantileerror'
+}
+
+# Upper bound on trees x rows traversed at once, to cap temporary memory
+MAX_NODES_PER_BLOCK = 4_000_000
+
+
+class CompiledTreeEnsemble:
+    """
+    Tree ensemble flattened into packed NumPy arrays
+
+    All trees share one node table (feature index, threshold, children,
+    leaf value). Prediction walks every tree for every row at once, one
+    depth level per step. Leaves point to themselves, so rows that reach a
+    leaf early simply stay there.
+
+    Produced by compile_model(); not meant to be built by hand.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, default_left,
+                 roots, max_depth, init, tree_scale, n_features,
+                 average=False, strict_less=False, accumulate_dtype=np.float64,
+                 scaler_mean=None, scaler_scale=None, feature_names_in=None,
+                 source=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.default_left = default_left
+        self.roots = roots
+        self.max_depth = max_depth
+        self.init = init
+        self.tree_scale = tree_scale
+        self.n_features = n_features
+        self.average = average
+        self.strict_less = strict_less
+        self.accumulate_dtype = accumulate_dtype
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+        self.feature_names_in = feature_names_in
+        self.source = source
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def to_float32(self):
+        """
+        Copy with float32 thresholds and leaf values, for smaller artifacts
+
+        Inputs are compared in float32, so rounding each threshold down to
+        the nearest float32 sends every row down the same branches as
+        before (XGBoost thresholds already are float32). Only the leaf
+        values lose precision, so check the predictions before serving it.
+
+        Returns:
+            CompiledTreeEnsemble: The downcast copy
+        """
+        threshold = self.threshold
+        if threshold.dtype != np.float32:
+            rounded = threshold.astype(np.float32)
+            # float32 rounding may go up; step back so x <= t keeps its answer
+            threshold = np.where(rounded > threshold, np.nextafter(rounded, np.float32(-np.inf)), rounded)
+        downcast = copy.copy(self)
+        downcast.threshold = np.ascontiguousarray(threshold, dtype=np.float32)
+        downcast.value = np.ascontiguousarray(self.value, dtype=np.float32)
+        return downcast
+
+    def _prepare(self, X):
+        """Reorder, scale and cast input exactly as the original estimator would"""
+        if self.feature_names_in is not None and hasattr(X, 'columns'):
+            X = X[self.feature_names_in]
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but the model expects {self.n_features}"
+            )
+
+        if self.scaler_mean is not None:
+            X = X - self.scaler_mean
+        if self.scaler_scale is not None:
+            X = X / self.scaler_scale
+
+        # Both sklearn trees and XGBoost compare in float32 feature space
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def _leaf_values(self, X):
+        """Leaf value reached in every tree, shape (n_trees, n_rows)"""
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        row_offsets = (np.arange(n_rows) * n_features)[np.newaxis, :]
+        node = np.repeat(self.roots[:, np.newaxis], n_rows, axis=1)
+
+        for _ in range(self.max_depth):
+            x = flat.take(row_offsets + self.feature.take(node))
+            threshold = self.threshold.take(node)
+            go_left = x < threshold if self.strict_less else x <= threshold
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, self.default_left.take(node), go_left)
+            node = np.where(go_left, self.left.take(node), self.right.take(node))
+
+        return self.value.take(node)
+
+    def predict(self, X):
+        """
+        Predict with the compiled ensemble
+
+        Args:
+            X: Features (pandas DataFrame or array-like), same layout as the
+                original estimator was fitted on
+
+        Returns:
+            np.array: Predicted values
+        """
+        X = self._prepare(X)
+        n_rows = X.shape[0]
+        predictions = np.empty(n_rows, dtype=np.float64)
+        block = max(1, MAX_NODES_PER_BLOCK // max(1, self.n_trees))
+
+        for start in range(0, n_rows, block):
+            values = self._leaf_values(X[start:start + block])
+            out = np.full(values.shape[1], self.init, dtype=self.accumulate_dtype)
+            # Accumulate tree by tree, in the same order as the original
+            # estimator, so rounding matches it exactly
+            if self.tree_scale == 1.0:
+                for tree_values in values:
+                    out += tree_values
+            else:
+                for tree_values in values:
+                    out += self.tree_scale * tree_values
+            predictions[start:start + block] = out
+
+        if self.average:
+            predictions /= self.n_trees
+        return predictions
+
+
+def _pack(trees):
+    """
+    Concatenate per-tree node arrays into one node table
+
+    Args:
+        trees (list): (feature, threshold, left, right, value, default_left)
+            tuples with tree-local child indices (-1 for leaves)
+
+    Returns:
+        dict: Packed arrays plus tree roots and maximum depth
+    """
+    offsets = np.cumsum([0] + [len(t[0]) for t in trees])
+    n_nodes = offsets[-1]
+
+    feature = np.zeros(n_nodes, dtype=np.int32)
+    left = np.empty(n_nodes, dtype=np.int32)
+    right = np.empty(n_nodes, dtype=np.int32)
+    default_left = np.zeros(n_nodes, dtype=bool)
+    threshold_dtype = trees[0][1].dtype
+    threshold = np.zeros(n_nodes, dtype=threshold_dtype)
+    value = np.zeros(n_nodes, dtype=trees[0][4].dtype)
+    max_depth = 0
+
+    for offset, (t_feature, t_threshold, t_left, t_right, t_value, t_default_left) in zip(offsets, trees):
+        size = len(t_feature)
+        local = np.arange(size)
+        is_leaf = t_left < 0
+        span = slice(offset, offset + size)
+
+        feature[span] = np.where(is_leaf, 0, t_feature)
+        threshold[span] = np.where(is_leaf, 0, t_threshold)
+        left[span] = offset + np.where(is_leaf, local, t_left)
+        right[span] = offset + np.where(is_leaf, local, t_right)
+        value[span] = np.where(is_leaf, t_value, 0)
+        default_left[span] = t_default_left
+
+        # Walk the tree level by level to find its depth
+        depth = 0
+        frontier = np.array([0])
+        while True:
+            internal = frontier[~is_leaf[frontier]]
+            if not internal.size:
+                break
+            frontier = np.concatenate([t_left[internal], t_right[internal]])
+            depth += 1
+        max_depth = max(max_depth, depth)
+
+    return {
+        'feature': feature,
+        'threshold': threshold,
+        'left': left,
+        'right': right,
+        'value': value,
+        'default_left': default_left,
+        'roots': offsets[:-1].astype(np.int32),
+        'max_depth': max_depth
+    }
+
+
+def _sklearn_tree_arrays(estimator):
+    tree = estimator.tree_
+    if tree.n_outputs != 1:
+        raise TypeError("Only single-output regression trees can be compiled")
+    # Trees fitted without missing values send NaN right, as a failed <= does
+    missing_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+    return (
+        tree.feature,
+        tree.threshold,
+        tree.children_left,
+        tree.children_right,
+        tree.value[:, 0, 0],
+        np.asarray(missing_left, dtype=bool)
+    )
+
+
+def _compile_forest(forest):
+    packed = _pack([_sklearn_tree_arrays(tree) for tree in forest.estimators_])
+    # Forests sum tree outputs in tree order, then divide by the tree count
+    return CompiledTreeEnsemble(
+        init=0.0, tree_scale=1.0, n_features=forest.n_features_in_,
+        average=True, source=type(forest).__name__, **packed
+    )
+
+
+def _compile_gradient_boosting(gbr):
+    from sklearn.dummy import DummyRegressor
+
+    if gbr.estimators_.shape[1] != 1:
+        raise TypeError("Only single-output gradient boosting can be compiled")
+    if gbr.init_ == 'zero':
+        init = 0.0
+    elif isinstance(gbr.init_, DummyRegressor):
+        init = float(np.ravel(gbr.init_.constant_)[0])
+    else:
+        raise TypeError("Only gradient boosting with a constant init can be compiled")
+    packed = _pack([_sklearn_tree_arrays(tree) for tree in gbr.estimators_[:, 0]])
+    return CompiledTreeEnsemble(
+        init=init, tree_scale=float(gbr.learning_rate),
+        n_features=gbr.n_features_in_, source=type(gbr).__name__, **packed
+    )
+
+
+def _compile_xgboost(xgb_model):
+    booster = xgb_model.get_booster()
+    config = json.loads(booster.save_raw(raw_format='json'))['learner']
+
+    objective = config['objective']['name']
+    if objective not in XGB_IDENTITY_OBJECTIVES:
+        raise TypeError(f"XGBoost objective {objective} cannot be compiled")
+    booster_config = config['gradient_booster']
+    if booster_config['name'] != 'gbtree':
+        raise TypeError(f"XGBoost booster {booster_config['name']} cannot be compiled")
+
+    trees_json = booster_config['model']['trees']
+    # Respect early stopping the same way XGBRegressor.predict does
+    try:
+        n_parallel = int(booster_config['model']['gbtree_model_param'].get('num_parallel_tree', 1))
+        trees_json = trees_json[:(xgb_model.best_iteration + 1) * n_parallel]
+    except AttributeError:
+        pass
+
+    trees = []
+    for tree in trees_json:
+        if any(tree.get('split_type', [])):
+            raise TypeError("XGBoost categorical splits cannot be compiled")
+        left = np.asarray(tree['left_children'], dtype=np.int32)
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        trees.append((
+            np.asarray(tree['split_indices'], dtype=np.int32),
+            conditions,
+            left,
+            np.asarray(tree['right_children'], dtype=np.int32),
+            # A leaf stores its output in split_conditions
+            conditions,
+            np.asarray(tree['default_left'], dtype=bool)
+        ))
+
+    base_score = float(config['learner_model_param']['base_score'].strip('[]'))
+    packed = _pack(trees)
+    return CompiledTreeEnsemble(
+        init=np.float32(base_score), tree_scale=1.0,
+        n_features=int(config['learner_model_param']['num_feature']),
+        strict_less=True, accumulate_dtype=np.float32,
+        source=type(xgb_model).__name__, **packed
+    )
+
+
+def _compile_estimator(estimator):
+    from sklearn.ensemble import (
+        ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+    )
+
+    if isinstance(estimator, (RandomForestRegressor, ExtraTreesRegressor)):
+        return _compile_forest(estimator)
+    if isinstance(estimator, GradientBoostingRegressor):
+        return _compile_gradient_boosting(estimator)
+    if type(estimator).__name__ == 'XGBRegressor':
+        return _compile_xgboost(estimator)
+    raise TypeError(f"Cannot compile estimator of type {type(estimator).__name__}")
+
+
+def compile_model(model):
+    """
+    Compile a fitted tree ensemble into a CompiledTreeEnsemble
+
+    Supports RandomForestRegressor, ExtraTreesRegressor,
+    GradientBoostingRegressor and XGBRegressor, either bare or as the final
+    step of a Pipeline whose only other step is a StandardScaler.
+    Predictions are numerically identical to model.predict.
+
+    Args:
+        model: Fitted estimator or Pipeline
+
+    Returns:
+        CompiledTreeEnsemble: Drop-in replacement for model.predict
+
+    Raises:
+        TypeError: If the model is not a supported tree ensemble
+    """
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = None
+    estimator = model
+    if isinstance(model, Pipeline):
+        steps = [step for _, step in model.steps if step not in (None, 'passthrough')]
+        if len(steps) == 2 and isinstance(steps[0], StandardScaler):
+            scaler, estimator = steps
+        elif len(steps) == 1:
+            estimator = steps[0]
+        else:
+            raise TypeError("Only Pipeline(StandardScaler, tree ensemble) can be compiled")
+
+    compiled = _compile_estimator(estimator)
+
+    feature_names_source = scaler if scaler is not None else estimator
+    feature_names_in = getattr(feature_names_source, 'feature_names_in_', None)
+    if feature_names_in is not None:
+        compiled.feature_names_in = list(feature_names_in)
+    if scaler is not None:
+        compiled.n_features = scaler.n_features_in_
+        if scaler.with_mean:
+            compiled.scaler_mean = scaler.mean_
+        if scaler.with_std:
+            compiled.scaler_scale = scaler.scale_
+
+    logger.info(
+        f"Compiled {compiled.source} with {compiled.n_trees} trees, "
+        f"{compiled.n_nodes} nodes, max depth {compiled.max_depth}"
+    )
+    return compiled
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    import joblib
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Compile a model artifact and check it against the original")
+    parser.add_argument('model_path', help="joblib artifact with 'model' and 'feature_names'")
+    parser.add_argument('data_path', help="CSV with the model's feature columns")
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    model_data = joblib.load(args.model_path)
+    model = model_data['model']
+    X = pd.read_csv(args.data_path, nrows=args.rows)[list(model_data['feature_names'])]
+
+    compiled = compile_model(model)
+    expected = model.predict(X)
+    actual = compiled.predict(X)
+    print(f"Max abs difference: {np.max(np.abs(expected - actual)):.3g}")
+    print(f"Identical: {np.array_equal(expected, actual)}")
+
+    row = X.iloc[:1]
+    for name, predictor in [('original', model), ('compiled', compiled)]:
+        start = time.perf_counter()
+        for _ in range(200):
+            predictor.predict(row)
+        single = (time.perf_counter() - start) / 200 * 1000
+        start = time.perf_counter()
+        predictor.predict(X)
+        batch = (time.perf_counter() - start) * 1000
+        print(f"{name}: single row {single:.3f} ms, {len(X)} rows {batch:.1f} ms")
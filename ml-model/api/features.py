@@ -0,0 +1,126 @@
+import threading
+import numpy as np
+
+# Feature name mapping from API input to model features
+FEATURE_MAPPING = {
+    'bedrooms': 'number of bedrooms',
+    'bathrooms': 'number of bathrooms',
+    'sqft_living': 'living area',
+    'sqft_lot': 'lot area',
+    'floors': 'number of floors',
+    'waterfront': 'waterfront present',
+    'view': 'number of views',
+    'condition': 'condition of the house',
+    'grade': 'grade of the house',
+    'sqft_above': 'Area of the house(excluding basement)',
+    'sqft_basement': 'Area of the basement',
+    'yr_built': 'Built Year',
+    'yr_renovated': 'Renovation Year',
+    'zipcode': 'Postal Code',
+    'sqft_living15': 'living_area_renov',
+    'sqft_lot15': 'lot_area_renov'
+}
+
+# Optional inputs that fall back to a default value when missing
+DEFAULT_FEATURES = {
+    'schools_nearby': ('Number of schools nearby', 5),
+    'airport_distance': ('Distance from the airport', 10.5)
+}
+
+
+def map_features(data):
+    """
+    Map API input names to model feature names
+
+    Args:
+        data (dict): Request JSON
+
+    Returns:
+        dict: Model feature name -> value, with defaults filled in
+    """
+    mapped_data = {}
+    for api_name, model_name in FEATURE_MAPPING.items():
+        if api_name in data:
+            mapped_data[model_name] = data[api_name]
+
+    for api_name, (model_name, default) in DEFAULT_FEATURES.items():
+        mapped_data[model_name] = data.get(api_name, default)
+
+    return mapped_data
+
+
+class FeatureVectorBuilder:
+    """
+    Build model input rows straight from request JSON, without pandas
+
+    The column order is taken from the feature_names persisted with the
+    model, so the row matches what the model was fitted on. Each thread
+    reuses its own preallocated contiguous row.
+    """
+
+    def __init__(self, feature_names):
+        """
+        Precompile the input -> column lookups
+
+        Args:
+            feature_names: Model feature names, in training column order
+        """
+        self.feature_names = list(feature_names)
+        column_index = {name: i for i, name in enumerate(self.feature_names)}
+
+        # (api name, column index, default or None) for every input the model uses
+        self._sources = []
+        for api_name, model_name in FEATURE_MAPPING.items():
+            if model_name in column_index:
+                self._sources.append((api_name, column_index[model_name], None))
+        for api_name, (model_name, default) in DEFAULT_FEATURES.items():
+            if model_name in column_index:
+                self._sources.append((api_name, column_index[model_name], float(default)))
+
+        mapped = {index for _, index, _ in self._sources}
+        self.unmapped_features = [
+            name for i, name in enumerate(self.feature_names) if i not in mapped
+        ]
+        self._local = threading.local()
+
+    def _row(self):
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = np.empty((1, len(self.feature_names)), dtype=np.float64)
+            self._local.row = row
+        return row
+
+    def build(self, data):
+        """
+        Build a single model input row
+
+        Args:
+            data (dict): Request JSON
+
+        Returns:
+            np.ndarray: C-contiguous float64 array of shape (1, n_features).
+                The array is reused by the next call on the same thread.
+
+        Raises:
+            ValueError: If a required input is missing or not numeric
+        """
+        if self.unmapped_features:
+            raise ValueError(f"Model features without an API input: {self.unmapped_features}")
+
+        row = self._row()
+        missing = []
+        for api_name, index, default in self._sources:
+            value = data.get(api_name)
+            if value is None:
+                if default is None:
+                    missing.append(api_name)
+                    continue
+                value = default
+            try:
+                row[0, index] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid value for {api_name}: {value!r}")
+
+        if missing:
+            raise ValueError(f"Missing required features: {missing}")
+        return row
@@ -0,0 +1,30 @@
+import gc
+import os
+
+# Load the app, and with it the model, once in the master process. Workers
+# are forked from it and share the model's pages copy-on-write instead of
+# each loading their own copy.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+if preload_app:
+    # Threads started while the master imports the app do not survive the
+    # fork, so app.py leaves the model watcher to post_fork
+    os.environ['MODEL_WATCHER_AFTER_FORK'] = '1'
+
+
+def when_ready(server):
+    if preload_app:
+        # Keep the garbage collector from touching (and so un-sharing) the
+        # pages of objects loaded before the fork
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app import start_model_watcher
+        start_model_watcher()
+
+
+def post_worker_init(worker):
+    from memory_stats import process_memory
+    worker.log.info(f"Worker memory: {process_memory()}")
@@ -0,0 +1,86 @@
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# /proc/<pid>/smaps_rollup fields reported, all in kB
+SMAPS_FIELDS = {
+    'Rss': 'rss_mb',
+    'Pss': 'pss_mb',
+    'Shared_Clean': 'shared_mb',
+    'Shared_Dirty': 'shared_mb',
+    'Private_Clean': 'private_mb',
+    'Private_Dirty': 'private_mb'
+}
+
+
+def process_memory(pid='self'):
+    """
+    Resident memory of a process, split into shared and private pages
+
+    Pages shared with other processes (e.g. a model loaded before gunicorn
+    forks, or a memory-mapped model file) count in shared_mb. pss_mb divides
+    each shared page between the processes using it, so summing pss_mb over
+    all workers gives their true combined footprint.
+
+    Args:
+        pid: Process id, or 'self' for the calling process
+
+    Returns:
+        dict: pid, rss_mb, pss_mb, shared_mb and private_mb (Linux), or
+            just max_rss_mb where /proc is not available, or only pid where
+            the resource module is not either (Windows)
+    """
+    memory = {'pid': os.getpid() if pid == 'self' else int(pid)}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            lines = f.readlines()
+    except OSError:
+        if pid != 'self':
+            raise
+        if resource is None:
+            return memory
+        # ru_maxrss is in kB on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        memory['max_rss_mb'] = round(max_rss / scale, 1)
+        return memory
+
+    totals = dict.fromkeys(SMAPS_FIELDS.values(), 0)
+    for line in lines:
+        parts = line.split()
+        field = parts[0].rstrip(':')
+        if field in SMAPS_FIELDS:
+            totals[SMAPS_FIELDS[field]] += int(parts[1])
+
+    memory.update({name: round(kb / 1024, 1) for name, kb in totals.items()})
+    return memory
+
+
+def child_pids(pid):
+    """Direct children of a process, e.g. the workers of a gunicorn master"""
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python memory_stats.py <gunicorn_master_pid>")
+        sys.exit(1)
+
+    master = int(sys.argv[1])
+    workers = child_pids(master)
+    print(f"{'process':>16} {'rss_mb':>9} {'pss_mb':>9} {'shared_mb':>10} {'private_mb':>11}")
+    total_rss = total_pss = 0.0
+    for label, pid in [('master', master)] + [('worker', pid) for pid in workers]:
+        memory = process_memory(pid)
+        total_rss += memory['rss_mb']
+        total_pss += memory['pss_mb']
+        print(
+            f"{label + ' ' + str(pid):>16} {memory['rss_mb']:>9.1f} {memory['pss_mb']:>9.1f} "
+            f"{memory['shared_mb']:>10.1f} {memory['private_mb']:>11.1f}"
+        )
+    print(f"Sum of RSS: {total_rss:.1f} MB, actual footprint (sum of PSS): {total_pss:.1f} MB")
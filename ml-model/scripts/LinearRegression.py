@@ -2,14 +2,14 @@ from sklearn.linear_model import LassoCV, ElasticNetCV
 from sklearn.preprocessing import StandardScaler, PolynomialFeatures, OneHotEncoder
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
-from sklearn.model_selection import cross_val_score
+from cv_engine import cross_fit
 from sklearn.feature_selection import SelectKBest, f_regression, VarianceThreshold
 import numpy as np
 import pandas as pd
 import warnings
 
 
-def train_linear_regression(X_train, y_train):
+def train_linear_regression(X_train, y_train, n_jobs=-1, return_cv=False):
     """
     Train an optimized Linear Regression model with improved accuracy
     and ensemble compatibility.
@@ -17,9 +17,11 @@ def train_linear_regression(X_train, y_train):
     Args:
         X_train: Training features (numpy array or pandas DataFrame)
         y_train: Training target values (numpy array or pandas Series)
+        n_jobs: Cores for the regularization path search (-1 for all)
+        return_cv: Also return the CVResult (out-of-fold predictions and scores)
 
     Returns:
-        Trained regression pipeline
+        Trained regression pipeline, and the CVResult if return_cv
     """
     # Convert inputs to consistent types
     if isinstance(X_train, np.ndarray):
@@ -62,7 +64,7 @@ def train_linear_regression(X_train, y_train):
         cv=3,
         random_state=42,
         selection='random',
-        n_jobs=-1
+        n_jobs=n_jobs
     )
     
     # Final pipeline
@@ -75,11 +77,12 @@ def train_linear_regression(X_train, y_train):
     import time
     start_time = time.time()
     
-    # Train the model
+    # Cross-validate, then train the final model on all rows
     print("\n🔍 Training optimized Linear Regression model...")
     with warnings.catch_warnings():
         warnings.simplefilter("ignore")
-        pipeline.fit(X_train, y_train)
+        cv_result = cross_fit(pipeline, X_train, y_train, cv=3)
+    pipeline = cv_result.final_model
     
     # End timer
     training_time = time.time() - start_time
@@ -98,12 +101,8 @@ def train_linear_regression(X_train, y_train):
     except Exception as e:
         print(f"Couldn't extract feature importances: {e}")
     
-    # Cross-validation
-    cv_scores = cross_val_score(
-        pipeline, X_train, y_train,
-        cv=3,
-        scoring='r2'
-    )
-    print(f"\n🔍 Optimized Linear Regression CV R²: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
+    print(f"\n🔍 Optimized Linear Regression CV R²: {cv_result.summary('r2')}")
     
+    if return_cv:
+        return pipeline, cv_result
     return pipeline
\ No newline at end of file
@@ -1,20 +1,22 @@
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
-from sklearn.model_selection import cross_val_score
+from cv_engine import cross_fit
 import numpy as np
 import pandas as pd
 
-def train_random_forest(X_train, y_train):
+def train_random_forest(X_train, y_train, n_jobs=-1, return_cv=False):
     """
     Train a Random Forest model with preprocessing pipeline and optimized parameters
     
     Args:
         X_train: Training features (numpy array or pandas DataFrame)
         y_train: Training target values (numpy array or pandas Series)
+        n_jobs: Cores used to build trees (-1 for all)
+        return_cv: Also return the CVResult (out-of-fold predictions and scores)
         
     Returns:
-        Trained Random Forest pipeline
+        Trained Random Forest pipeline, and the CVResult if return_cv
     """
     # Convert inputs to consistent types
     if isinstance(X_train, np.ndarray):
@@ -41,21 +43,14 @@ def train_random_forest(X_train, y_train):
             max_features='sqrt',       # Number of features to consider for best split
             bootstrap=True,            # Use bootstrap samples
             random_state=42,
-            n_jobs=-1                  # Use all CPU cores
+            n_jobs=n_jobs              # CPU cores (-1 for all)
         ))
     ])
     
-    # Perform cross-validation
-    cv_scores = cross_val_score(
-        pipeline, X_train, y_train,
-        cv=5,
-        scoring='neg_mean_squared_error'
-    )
-    rmse_scores = np.sqrt(-cv_scores)
-    print(f"\nCross-validation RMSE: {rmse_scores.mean():.4f} (+/- {rmse_scores.std() * 2:.4f})")
-    
-    # Train the final model
-    pipeline.fit(X_train, y_train)
+    # Cross-validate, then train the final model on all rows
+    cv_result = cross_fit(pipeline, X_train, y_train, cv=5)
+    print(f"\nCross-validation RMSE: {cv_result.summary('rmse')}")
+    pipeline = cv_result.final_model
     
     # Print feature importances
     feature_importances = pipeline.named_steps['regressor'].feature_importances_
@@ -65,4 +60,6 @@ def train_random_forest(X_train, y_train):
     for idx in sorted_idx[:10]:
         print(f"{feature_names[idx]}: {feature_importances[idx]:.4f}")
     
+    if return_cv:
+        return pipeline, cv_result
     return pipeline
@@ -1,42 +1,64 @@
 import xgboost as xgb
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
-from sklearn.model_selection import cross_val_score, train_test_split
+from cv_engine import cross_fit
+from xgb_tuning import successive_halving
 import numpy as np
 
-def train_xgboost(X_train, y_train):
+# Parameters of the untuned model
+DEFAULT_PARAMS = {
+    'n_estimators': 1000,
+    'learning_rate': 0.01,
+    'max_depth': 7,
+    'min_child_weight': 1,
+    'gamma': 0.1,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'reg_alpha': 0.1,
+    'reg_lambda': 1.0
+}
+
+def train_xgboost(X_train, y_train, n_jobs=-1, return_cv=False, tune=False, tune_trials=27):
     """
     Train an XGBoost model with preprocessing pipeline and optimized parameters
+    
+    n_jobs sets the number of boosting threads (-1 for all cores). With
+    return_cv the CVResult of the cross-validation is returned as well.
+    
+    With tune, the parameters and n_estimators come from a successive
+    halving search over tune_trials configurations (see xgb_tuning) on
+    n_jobs cores, instead of DEFAULT_PARAMS. The search result is attached
+    to the returned pipeline as tuning_report_.
     """
+    params = dict(DEFAULT_PARAMS)
+    tuning_report = None
+    if tune:
+        print(f"Tuning XGBoost over {tune_trials} configurations...")
+        tuning_report = successive_halving(
+            X_train, y_train, n_configs=tune_trials,
+            cpu_budget=None if n_jobs == -1 else n_jobs
+        )
+        params.update(tuning_report['best_params'])
+        params['n_estimators'] = tuning_report['n_estimators']
+        print(f"Best parameters ({tuning_report['search_seconds']:.1f} s search): {params}")
+    
     # Create preprocessing and model pipeline
     pipeline = Pipeline([
         ('scaler', StandardScaler()),
         ('regressor', xgb.XGBRegressor(
-            n_estimators=1000,
-            learning_rate=0.01,
-            max_depth=7,
-            min_child_weight=1,
-            gamma=0.1,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            reg_alpha=0.1,
-            reg_lambda=1.0,
-            # Remove early_stopping_rounds parameter
+            **params,
             random_state=42,
-            n_jobs=-1
+            n_jobs=n_jobs
         ))
     ])
     
-    # Perform cross-validation
-    cv_scores = cross_val_score(
-        pipeline, X_train, y_train,
-        cv=5,
-        scoring='neg_mean_squared_error'
-    )
-    rmse_scores = np.sqrt(-cv_scores)
-    print(f"Cross-validation RMSE: {rmse_scores.mean():.4f} (+/- {rmse_scores.std() * 2:.4f})")
-    
-    # Train the final model
-    pipeline.fit(X_train, y_train)
+    # Cross-validate, then train the final model on all rows
+    cv_result = cross_fit(pipeline, X_train, y_train, cv=5)
+    print(f"Cross-validation RMSE: {cv_result.summary('rmse')}")
     
-    return pipeline
\ No newline at end of file
+    model = cv_result.final_model
+    if tuning_report is not None:
+        model.tuning_report_ = tuning_report
+    if return_cv:
+        return model, cv_result
+    return model
@@ -0,0 +1,114 @@
+import argparse
+import os
+import statistics
+import time
+
+import joblib
+import numpy as np
+import xgboost as xgb
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from dataset_cache import load_dataset
+from ensemblevoting import VotingEnsembleRegressor, rank_weights
+
+
+def build_ensemble(X, y):
+    """A prefit ensemble of smaller stand-ins for the three trained members"""
+    members = [
+        ('linear', Pipeline([('scaler', StandardScaler()), ('regressor', Ridge())])),
+        ('random_forest', RandomForestRegressor(n_estimators=200, max_depth=20, n_jobs=-1, random_state=42)),
+        ('xgboost', xgb.XGBRegressor(n_estimators=300, max_depth=7, n_jobs=-1, random_state=42))
+    ]
+    for name, model in members:
+        print(f"Training {name}...")
+        model.fit(X, y)
+    return VotingEnsembleRegressor(models=members, weights=[0.2, 0.4, 0.4], prefit=True).fit(X, y)
+
+
+def time_predict(ensemble, X, repeats):
+    """Latencies of repeated ensemble.predict(X) calls, in ms"""
+    ensemble.predict(X)  # warm up
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        ensemble.predict(X)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label, latencies):
+    p95 = sorted(latencies)[int(np.ceil(0.95 * len(latencies))) - 1]
+    print(f"{label:<24} median {statistics.median(latencies):9.2f} ms   p95 {p95:9.2f} ms")
+    return statistics.median(latencies)
+
+
+def loop_rank_weights(predictions):
+    """Rank weights as first implemented: one np.delete copy and mean per member"""
+    mse_values = []
+    for i in range(len(predictions)):
+        avg_pred = np.mean(np.delete(predictions, i, axis=0), axis=0)
+        mse_values.append(np.mean((predictions[i] - avg_pred) ** 2))
+    inv_mse = 1 / (np.array(mse_values) + 1e-10)
+    return inv_mse / np.sum(inv_mse)
+
+
+def benchmark_rank_weights(repeats=5):
+    """Compare loop_rank_weights and rank_weights on synthetic price predictions"""
+    rng = np.random.default_rng(42)
+    print(f"{'members':>8} {'rows':>9} {'loop ms':>10} {'vectorized ms':>14} {'speedup':>8} {'max rel diff':>13}")
+    for n_members in (3, 10, 30):
+        for n_rows in (10000, 1000000):
+            truth = rng.uniform(1e5, 5e6, n_rows)
+            predictions = truth * rng.normal(1.0, rng.uniform(0.02, 0.2, (n_members, 1)), (n_members, n_rows))
+            timings = []
+            for weigh in (loop_rank_weights, rank_weights):
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    weigh(predictions)
+                timings.append((time.perf_counter() - start) / repeats * 1000)
+            diff = np.max(np.abs(rank_weights(predictions) / loop_rank_weights(predictions) - 1))
+            print(f"{n_members:>8} {n_rows:>9} {timings[0]:>10.1f} {timings[1]:>14.1f} "
+                  f"{timings[0] / timings[1]:>7.1f}x {diff:>13.1e}")
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    default_data = os.path.join(os.path.dirname(script_dir), 'dataset', 'House_Price_India.csv')
+
+    parser = argparse.ArgumentParser(description="Benchmark ensemble prediction latency and rank voting weights")
+    parser.add_argument('--ensemble', help="Saved VotingEnsembleRegressor (default: train small stand-in members)")
+    parser.add_argument('--data', default=default_data, help="CSV with a Price column")
+    parser.add_argument('--single-repeats', type=int, default=200, help="Single-row predictions timed")
+    parser.add_argument('--batch-rows', type=int, default=10000, help="Rows in the batch benchmark")
+    parser.add_argument('--batch-repeats', type=int, default=10, help="Batch predictions timed")
+    parser.add_argument('--rank-weights', action='store_true',
+                        help="Only benchmark the rank voting weights, looped vs vectorized")
+    args = parser.parse_args()
+
+    if args.rank_weights:
+        benchmark_rank_weights()
+        raise SystemExit(0)
+
+    data = load_dataset(args.data)
+    X = data.drop('Price', axis=1)
+    y = data['Price']
+
+    if args.ensemble:
+        ensemble = joblib.load(args.ensemble)
+    else:
+        ensemble = build_ensemble(X, y)
+
+    single = X.iloc[:1]
+    batch = X.sample(n=args.batch_rows, replace=len(X) < args.batch_rows, random_state=42)
+
+    print(f"\n{len(ensemble.models)} members, {os.cpu_count()} CPUs")
+    for rows, label, repeats in [(single, 'single row', args.single_repeats),
+                                 (batch, f'{len(batch)} rows', args.batch_repeats)]:
+        ensemble.n_jobs = None
+        sequential = report(f"{label}, sequential", time_predict(ensemble, rows, repeats))
+        ensemble.n_jobs = -1
+        parallel = report(f"{label}, threaded", time_predict(ensemble, rows, repeats))
+        print(f"{'':<24} speedup {sequential / parallel:.2f}x\n")
@@ -0,0 +1,73 @@
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import KFold
+
+
+class CVResult:
+    """
+    Everything one cross-validation run produced
+
+    Attributes:
+        oof_predictions: Prediction for every training row from the fold
+            model that did not see it
+        fold_rmse, fold_r2: Scores of each fold model on its held-out rows
+        oof_rmse, oof_r2: Scores of the out-of-fold predictions as a whole
+        final_model: Model fitted once on all rows
+    """
+
+    def __init__(self, oof_predictions, fold_rmse, fold_r2, y, final_model):
+        self.oof_predictions = oof_predictions
+        self.fold_rmse = np.asarray(fold_rmse)
+        self.fold_r2 = np.asarray(fold_r2)
+        self.oof_rmse = np.sqrt(mean_squared_error(y, oof_predictions))
+        self.oof_r2 = r2_score(y, oof_predictions)
+        self.final_model = final_model
+
+    def summary(self, metric='rmse'):
+        """Mean and +/- two standard deviations of a fold score, as cross_val_score was reported"""
+        scores = self.fold_rmse if metric == 'rmse' else self.fold_r2
+        return f"{scores.mean():.4f} (+/- {scores.std() * 2:.4f})"
+
+
+def _rows(data, index):
+    return data.iloc[index] if hasattr(data, 'iloc') else data[index]
+
+
+def cross_fit(estimator, X, y, cv=5):
+    """
+    Cross-validate an estimator and fit the final model on all rows
+
+    Unlike cross_val_score, the out-of-fold predictions are kept, so callers
+    can derive further metrics or ensemble weights from them without
+    fitting anything again. The fold models themselves are only used for
+    those predictions and are not kept.
+
+    Each call still fits cv + 1 models, the same as cross_val_score followed
+    by fit, so a single trainer costs what it did before. The saving is in
+    ensemblevoting.py, which weights its members by the out-of-fold scores
+    and adopts the trained members instead of fitting them again.
+
+    Args:
+        estimator: Unfitted estimator; it is cloned for every fit
+        X: Training features (numpy array or pandas DataFrame)
+        y: Training target values (numpy array or pandas Series)
+        cv (int): Number of folds, split in order as cross_val_score does
+
+    Returns:
+        CVResult: Out-of-fold predictions, scores and the final model
+    """
+    y_values = np.asarray(y, dtype=float)
+    oof_predictions = np.zeros(len(y_values))
+    fold_rmse, fold_r2 = [], []
+
+    for train_idx, test_idx in KFold(n_splits=cv).split(X):
+        model = clone(estimator).fit(_rows(X, train_idx), _rows(y, train_idx))
+        predictions = model.predict(_rows(X, test_idx))
+        oof_predictions[test_idx] = predictions
+
+        fold_rmse.append(np.sqrt(mean_squared_error(y_values[test_idx], predictions)))
+        fold_r2.append(r2_score(y_values[test_idx], predictions))
+
+    final_model = clone(estimator).fit(X, y)
+    return CVResult(oof_predictions, fold_rmse, fold_r2, y_values, final_model)
@@ -2,34 +2,97 @@ import pandas as pd
 import numpy as np
 from sklearn.preprocessing import PowerTransformer, RobustScaler, StandardScaler
 from sklearn.impute import SimpleImputer
-from scipy import stats
+import argparse
 import os
 
+from dataset_cache import load_dataset
+from streaming_stats import RowReservoir, RunningMoments
+
 class DataPreprocessor:
     def __init__(self):
         self.power_transformer = PowerTransformer(method='yeo-johnson')
         self.scaler = StandardScaler()
         self.imputer = SimpleImputer(strategy='median')
         self.skewed_features = []
+        self.outlier_counts = {}
         
-    def remove_outliers(self, data, columns, n_std=3.0):
-        """Remove outliers using IQR method and z-score"""
-        for column in columns:
-            # IQR method
-            Q1 = data[column].quantile(0.25)
-            Q3 = data[column].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            # Combine with z-score method
-            z_scores = np.abs(stats.zscore(data[column]))
-            data = data[
-                (data[column] >= lower_bound) & 
-                (data[column] <= upper_bound) & 
-                (z_scores < n_std)
-            ]
-        return data
+    def remove_outliers(self, data, columns, n_std=3.0, mode='sequential'):
+        """
+        Remove outliers using IQR method and z-score
+        
+        A row is an outlier in a column when it lies outside
+        [Q1 - 1.5 IQR, Q3 + 1.5 IQR] or n_std or more standard deviations
+        from the mean. Missing values count as outliers.
+        
+        Args:
+            data: DataFrame to filter
+            columns: Columns checked for outliers
+            n_std: z-score cutoff
+            mode: How the columns' statistics relate:
+                'sequential' - each column's quartiles and z-scores are
+                    computed on the rows kept by the columns before it, so
+                    the result depends on the column order (the original
+                    behaviour)
+                'independent' - every column's statistics come from the full
+                    input and a row is removed if any column flags it;
+                    order does not matter
+        
+        Returns:
+            DataFrame without the outlier rows. The rows removed per column
+            are kept in self.outlier_counts: in sequential mode the rows each
+            step removed, in independent mode the rows each column flags
+            (a row flagged by several columns counts in each).
+        """
+        if mode not in ('sequential', 'independent'):
+            raise ValueError(f"Unknown outlier mode: {mode}")
+        
+        columns = list(columns)
+        # One contiguous row per column
+        values = np.ascontiguousarray(data[columns].to_numpy(dtype=float).T)
+        self.outlier_counts = {}
+        
+        if mode == 'independent':
+            outliers = self._outlier_mask(values, n_std)
+            for column, count in zip(columns, outliers.sum(axis=1)):
+                self.outlier_counts[column] = int(count)
+            keep = ~outliers.any(axis=0)
+        else:
+            keep = np.ones(values.shape[1], dtype=bool)
+            for j, column in enumerate(columns):
+                rows = np.flatnonzero(keep)
+                outliers = self._outlier_mask(values[j:j + 1, rows], n_std)[0]
+                keep[rows[outliers]] = False
+                self.outlier_counts[column] = int(outliers.sum())
+        
+        return data[keep]
+    
+    def outlier_report(self):
+        """Rows removed per column by the last remove_outliers call, as printable text"""
+        removed = [f"{column}: {count}" for column, count in self.outlier_counts.items() if count]
+        return ', '.join(removed) if removed else 'none'
+    
+    @staticmethod
+    def _outlier_mask(values, n_std):
+        """Outlier flags for a (columns, rows) array, from each column's statistics"""
+        if np.isnan(values).any():
+            q1, q3 = np.nanquantile(values, [0.25, 0.75], axis=1, keepdims=True)
+            mean = np.nanmean(values, axis=1, keepdims=True)
+            std = np.nanstd(values, axis=1, keepdims=True)
+        else:
+            q1, q3 = np.quantile(values, [0.25, 0.75], axis=1, keepdims=True)
+            mean = values.mean(axis=1, keepdims=True)
+            std = values.std(axis=1, keepdims=True)
+        return DataPreprocessor._outliers(values, q1, q3, mean, std, n_std)
+    
+    @staticmethod
+    def _outliers(values, q1, q3, mean, std, n_std):
+        """Outlier flags for a (columns, rows) array, given per-column statistics of shape (columns, 1)"""
+        iqr = q3 - q1
+        # A constant column has no outliers by z-score
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = np.where(std > 0, np.abs(values - mean) / std, 0.0)
+        inside = (values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr) & (z_scores < n_std)
+        return ~inside | np.isnan(values)
     
     def create_interaction_features(self, data):
         """Create essential features that strongly influence house prices"""
@@ -64,11 +127,157 @@ class DataPreprocessor:
             data = pd.DataFrame(data)
         return data.fillna(data.median())
     
+    def partial_fit(self, chunk, target='Price', n_std=3.0, skew_threshold=1.0, sample_size=100000):
+        """
+        Accumulate preprocessing statistics from one chunk of a stream
+        
+        Streaming fit takes two passes over the data, each a series of
+        partial_fit calls closed by end_pass():
+        
+        1. Raw chunks: medians, outlier quartiles (from a reservoir sample of
+           sample_size rows) and running means/standard deviations.
+        2. The same chunks again, now filled and outlier-filtered with the
+           pass 1 statistics: running skewness moments, and a reservoir
+           sample the Yeo-Johnson transform is fitted on.
+        
+        The options are taken from the first call. Outliers are removed with
+        the 'independent' semantics of remove_outliers(), with statistics
+        of the raw rows. Compared to the in-memory path (handle_missing_values,
+        remove_outliers with mode='independent', detect_skewness and
+        power_transformer.fit_transform):
+        - quartiles and medians are within the reservoir's rank error (see
+          streaming_stats.RowReservoir), and exact when the data has at most
+          sample_size rows
+        - means, standard deviations and skewness are exact up to floating
+          point, apart from missing values, which the in-memory path fills
+          with the median before computing them
+        - Yeo-Johnson lambdas come from at most sample_size rows
+        
+        Args:
+            chunk (pd.DataFrame): Next rows of the stream
+            target: Column excluded from outlier checks
+            n_std: z-score cutoff for outliers
+            skew_threshold: Absolute skewness above which a column is transformed
+            sample_size: Rows kept for quantiles and the Yeo-Johnson fit
+        """
+        if getattr(self, '_stream', None) is None:
+            numeric = chunk.select_dtypes(include=[np.number]).columns.tolist()
+            self._stream = {
+                'pass': 1,
+                'numeric': numeric,
+                'outlier_columns': [col for col in numeric if col != target],
+                'n_std': n_std,
+                'skew_threshold': skew_threshold,
+                'sample_size': sample_size,
+                'moments': RunningMoments(len(numeric)),
+                'reservoir': RowReservoir(sample_size)
+            }
+        stream = self._stream
+        if stream['pass'] == 2:
+            chunk = self._filter_chunk(chunk)
+            columns = stream['columns']
+        elif stream['pass'] == 1:
+            columns = stream['numeric']
+        else:
+            raise ValueError("Streaming fit is complete; call transform()")
+        
+        values = chunk[columns].to_numpy(dtype=float)
+        stream['moments'].update(values)
+        stream['reservoir'].update(values)
+        return self
+    
+    def end_pass(self):
+        """
+        Close a pass of partial_fit calls
+        
+        Returns:
+            bool: True once both passes are done and transform() can be used
+        """
+        stream = self._stream
+        moments, reservoir = stream['moments'], stream['reservoir']
+        
+        if stream['pass'] == 1:
+            numeric = stream['numeric']
+            q1, median, q3 = reservoir.quantile([0.25, 0.5, 0.75])
+            self.medians = pd.Series(median, index=numeric)
+            
+            # Outlier statistics, shaped (columns, 1) like _outlier_mask uses
+            index = [numeric.index(col) for col in stream['outlier_columns']]
+            stream['outlier_stats'] = tuple(
+                stat[index][:, None] for stat in (q1, q3, moments.mean, moments.std())
+            )
+            
+            # Pass 2 sees the columns of filtered chunks, including interactions
+            stream['pass'] = 2
+            stream['columns'] = None
+            stream['moments'] = None
+            stream['reservoir'] = RowReservoir(stream['sample_size'])
+            return False
+        
+        columns = stream['columns']
+        skewness = moments.skew()
+        self.skewed_features = [
+            col for col, skew in zip(columns, skewness) if abs(skew) > stream['skew_threshold']
+        ]
+        if self.skewed_features:
+            sample = pd.DataFrame(reservoir.sample(), columns=columns)
+            self.power_transformer.fit(sample[self.skewed_features])
+        stream['pass'] = 3
+        return True
+    
+    def _filter_chunk(self, chunk):
+        """Fill missing values, drop outliers and add interactions with the pass 1 statistics"""
+        stream = self._stream
+        chunk = chunk.fillna(self.medians)
+        values = chunk[stream['outlier_columns']].to_numpy(dtype=float).T
+        keep = ~self._outliers(values, *stream['outlier_stats'], stream['n_std']).any(axis=0)
+        chunk = self.create_interaction_features(chunk[keep].copy())
+        
+        if stream['pass'] == 2 and stream['columns'] is None:
+            stream['columns'] = chunk.select_dtypes(include=[np.number]).columns.tolist()
+            stream['moments'] = RunningMoments(len(stream['columns']))
+        return chunk
+    
+    def fit_stream(self, make_chunks, **options):
+        """
+        Fit on data too large for memory
+        
+        Args:
+            make_chunks: Callable returning a fresh iterator of DataFrame
+                chunks, e.g. lambda: pd.read_csv(path, chunksize=100000);
+                it is called once per pass
+            **options: Passed to partial_fit
+            
+        Returns:
+            DataPreprocessor: self
+        """
+        for _ in range(2):
+            for chunk in make_chunks():
+                self.partial_fit(chunk, **options)
+            self.end_pass()
+        return self
+    
+    def transform(self, chunk):
+        """
+        Apply the streaming fit to a chunk
+        
+        Returns:
+            pd.DataFrame: The chunk with missing values filled, outlier rows
+                removed, interaction features added and skewed columns
+                Yeo-Johnson transformed
+        """
+        if getattr(self, '_stream', None) is None or self._stream['pass'] != 3:
+            raise ValueError("Fit the preprocessor with partial_fit/end_pass or fit_stream first")
+        chunk = self._filter_chunk(chunk)
+        if self.skewed_features and len(chunk):
+            chunk[self.skewed_features] = self.power_transformer.transform(chunk[self.skewed_features])
+        return chunk
+    
     def normalize_dataset(self, data_path, output_path):
         """Normalize the dataset and save to output path"""
         try:
             # Load data
-            data = pd.read_csv(data_path)
+            data = load_dataset(data_path)
             
             # Handle missing values
             data = self.handle_missing_values(data)
@@ -78,6 +287,7 @@ class DataPreprocessor:
             if 'Price' in numeric_features:
                 numeric_features.remove('Price')
             data = self.remove_outliers(data, numeric_features)
+            print(f"Outlier rows removed per column: {self.outlier_report()}")
             
             # Create interaction features (minimal)
             data = self.create_interaction_features(data)
@@ -95,6 +305,26 @@ class DataPreprocessor:
             print(f"Error normalizing dataset: {str(e)}")
             raise
 
+    def normalize_dataset_streaming(self, data_path, output_path, chunksize=100000):
+        """Normalize a dataset too large for memory, reading and writing it chunk by chunk"""
+        try:
+            def make_chunks():
+                return pd.read_csv(data_path, chunksize=chunksize)
+            
+            self.fit_stream(make_chunks)
+            print(f"Skewed features: {self.skewed_features}")
+            
+            rows = 0
+            for i, chunk in enumerate(make_chunks()):
+                chunk = self.transform(chunk)
+                chunk.to_csv(output_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+                rows += len(chunk)
+            print(f"Normalized dataset ({rows} rows) saved to: {output_path}")
+            
+        except Exception as e:
+            print(f"Error normalizing dataset: {str(e)}")
+            raise
+
 if __name__ == "__main__":
     try:
         # Get the absolute path to the script directory
@@ -106,11 +336,19 @@ if __name__ == "__main__":
         input_path = os.path.join(ml_model_dir, 'dataset', 'House_Price_India.csv')
         output_path = os.path.join(ml_model_dir, 'dataset', 'House_Price_India_normalized.csv')
         
+        parser = argparse.ArgumentParser(description="Normalize the house price dataset")
+        parser.add_argument('--chunksize', type=int, default=None,
+                            help="Process the dataset in chunks of this many rows instead of in memory")
+        args = parser.parse_args()
+        
         # Initialize preprocessor
         preprocessor = DataPreprocessor()
         
         # Process and normalize dataset
-        preprocessor.normalize_dataset(input_path, output_path)
+        if args.chunksize:
+            preprocessor.normalize_dataset_streaming(input_path, output_path, args.chunksize)
+        else:
+            preprocessor.normalize_dataset(input_path, output_path)
         
     except Exception as e:
         print(f"Error: {str(e)}")
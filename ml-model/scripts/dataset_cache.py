@@ -0,0 +1,236 @@
+# Canonical version of ml/src/dataset_cache.py: ml-model/scripts and ml/src are
+# deployed separately, each from its own directory with flat imports, so
+# they share no package to import one module from. Make changes here first,
+# then port them to the copy.
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Bump when the cache layout or the way columns are stored changes, so caches
+# written by an older version are rebuilt instead of misread
+SCHEMA_VERSION = 2
+
+# Copy-on-write maps: columns are read lazily from the page cache, and code
+# that modifies a column in place gets private pages instead of an error
+MMAP_MODE = 'c'
+
+CHUNK_BYTES = 1 << 20
+
+
+def cache_enabled():
+    return os.getenv('DATASET_CACHE', 'true').lower() in ('1', 'true', 'yes')
+
+
+def file_sha256(path):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_hash(csv_path, cache_root):
+    """
+    Content hash of the source CSV
+
+    The hash is remembered together with the file's size and modification
+    time, so an unchanged file is not re-read on every run.
+    """
+    stat = os.stat(csv_path)
+    stamp = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    stamp_path = os.path.join(cache_root, os.path.basename(csv_path) + '.source.json')
+    try:
+        with open(stamp_path) as f:
+            known = json.load(f)
+        if {key: known.get(key) for key in stamp} == stamp:
+            return known['sha256']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    stamp['sha256'] = file_sha256(csv_path)
+    tmp_path = f"{stamp_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(stamp, f)
+    os.replace(tmp_path, stamp_path)
+    return stamp['sha256']
+
+
+def _write_cache(data, cache_path, source_sha):
+    """Store each column as a .npy file, then move the directory into place"""
+    cache_root = os.path.dirname(cache_path)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=cache_root)
+    try:
+        columns = []
+        for i, name in enumerate(data.columns):
+            series = data[name]
+            column = {'name': name, 'dtype': str(series.dtype), 'file': f'{i}.npy'}
+            if series.dtype.kind in 'biuf':
+                np.save(os.path.join(tmp_dir, column['file']), series.to_numpy())
+            elif pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+                # Text as fixed-width unicode, which can be memory-mapped
+                # (object arrays cannot), plus a mask of missing values
+                missing = series.isna().to_numpy()
+                text = series.fillna('').astype(str).to_numpy().astype(str)
+                np.save(os.path.join(tmp_dir, column['file']), text)
+                column['missing'] = f'{i}.missing.npy'
+                np.save(os.path.join(tmp_dir, column['missing']), missing)
+            else:
+                # Any other values (e.g. True/False with missing entries, or
+                # numbers mixed with text) are pickled as they are, so they
+                # come back unchanged; such columns are loaded, not mapped
+                np.save(os.path.join(tmp_dir, column['file']), series.to_numpy(dtype=object),
+                        allow_pickle=True)
+                column['pickled'] = True
+            columns.append(column)
+
+        meta = {
+            'schema_version': SCHEMA_VERSION,
+            'source_sha256': source_sha,
+            'rows': len(data),
+            'columns': columns
+        }
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        try:
+            os.rename(tmp_dir, cache_path)
+        except OSError:
+            # Another process finished the same cache first
+            if not os.path.isdir(cache_path):
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def _read_cache(cache_path):
+    """DataFrame over the memory-mapped columns of a cache directory"""
+    with open(os.path.join(cache_path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('schema_version') != SCHEMA_VERSION:
+        raise ValueError(f"Cache schema {meta.get('schema_version')} is not {SCHEMA_VERSION}")
+
+    # An empty array has nothing to map
+    mmap_mode = MMAP_MODE if meta['rows'] else None
+    columns = {}
+    for column in meta['columns']:
+        path = os.path.join(cache_path, column['file'])
+        if column.get('pickled'):
+            columns[column['name']] = pd.Series(np.load(path, allow_pickle=True), dtype=column['dtype'])
+            continue
+        # A plain ndarray view of the map, so results are not np.memmap
+        values = np.asarray(np.load(path, mmap_mode=mmap_mode))
+        if 'missing' in column:
+            values = values.astype(object)
+            values[np.load(os.path.join(cache_path, column['missing']))] = np.nan
+            values = pd.Series(values, dtype=column['dtype'])
+        columns[column['name']] = values
+    # copy=False keeps one block per memory-mapped column instead of
+    # consolidating them into a new in-memory array
+    return pd.DataFrame(columns, copy=False)
+
+
+def _prune(cache_root, stem, keep):
+    """Remove caches of earlier versions of the same source file"""
+    pattern = re.compile(re.escape(stem) + r'-[0-9a-f]{16}-v\d+')
+    for entry in os.listdir(cache_root):
+        if pattern.fullmatch(entry) and entry != keep:
+            shutil.rmtree(os.path.join(cache_root, entry), ignore_errors=True)
+
+
+def load_dataset(csv_path, cache_dir=None):
+    """
+    Load a CSV file through a typed columnar cache
+
+    The first run parses the CSV and stores every column as a .npy file under
+    a key made of the file's SHA-256 and SCHEMA_VERSION. Later runs
+    memory-map those columns instead of parsing the CSV again. When the
+    source file changes its hash changes too, so it is parsed and cached anew.
+
+    Args:
+        csv_path (str): Source CSV
+        cache_dir (str): Cache location; defaults to $DATASET_CACHE_DIR or
+            a .cache directory next to the CSV. Set DATASET_CACHE=false to
+            always read the CSV.
+
+    Returns:
+        pd.DataFrame: The same columns and dtypes pd.read_csv(csv_path) gives
+    """
+    if not cache_enabled():
+        return pd.read_csv(csv_path)
+
+    cache_root = cache_dir or os.getenv('DATASET_CACHE_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(csv_path)), '.cache')
+    try:
+        os.makedirs(cache_root, exist_ok=True)
+        sha = source_hash(csv_path, cache_root)
+    except OSError as e:
+        print(f"Dataset cache unavailable ({str(e)}), reading CSV")
+        return pd.read_csv(csv_path)
+
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    entry = f"{stem}-{sha[:16]}-v{SCHEMA_VERSION}"
+    cache_path = os.path.join(cache_root, entry)
+    if os.path.isdir(cache_path):
+        try:
+            data = _read_cache(cache_path)
+            print(f"Loaded {len(data)} rows from dataset cache {cache_path}")
+            return data
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Dataset cache unreadable ({str(e)}), rebuilding")
+            shutil.rmtree(cache_path, ignore_errors=True)
+
+    data = pd.read_csv(csv_path)
+    try:
+        _write_cache(data, cache_path, sha)
+        _prune(cache_root, stem, entry)
+        print(f"Cached {len(data)} rows in {cache_path}")
+    except OSError as e:
+        print(f"Could not write dataset cache: {str(e)}")
+    return data
+
+
+def check_round_trip(data):
+    """
+    Write a DataFrame to a cache in a temporary directory and read it back
+
+    Raises:
+        AssertionError: If the cached frame differs from data in values or dtypes
+    """
+    with tempfile.TemporaryDirectory() as cache_root:
+        cache_path = os.path.join(cache_root, 'check')
+        _write_cache(data, cache_path, source_sha='')
+        pd.testing.assert_frame_equal(_read_cache(cache_path), data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check that cached datasets read back exactly as pd.read_csv returns them"
+    )
+    parser.add_argument('csv_paths', nargs='*',
+                        help="CSV files to check (default: a sample with text, boolean and mixed columns)")
+    args = parser.parse_args()
+
+    if args.csv_paths:
+        frames = {path: pd.read_csv(path) for path in args.csv_paths}
+    else:
+        frames = {'sample': pd.DataFrame({
+            'price': [350000.0, np.nan, 512000.0, 275000.0],
+            'bedrooms': [3, 4, 2, 3],
+            'city': ['Edmonton', 'Calgary', np.nan, ''],
+            'waterfront': [True, np.nan, False, True],
+            'lot': [4500, 'unknown', np.nan, 3.5]
+        })}
+    for name, data in frames.items():
+        check_round_trip(data)
+        print(f"{name}: {len(data)} rows, {len(data.columns)} columns round-trip unchanged")
@@ -0,0 +1,239 @@
+import argparse
+import os
+import pickle
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+
+from dataset_cache import load_dataset
+from model_registry import ModelRegistry
+
+# Columns with at most this many distinct values are treated as discrete:
+# perturbed by borrowing another row's value instead of adding noise
+MAX_DISCRETE_LEVELS = 100
+
+
+def load_teacher(model_path):
+    """
+    Load the model to distill
+
+    Only models that predict from the raw CSV columns are supported: the
+    saved VotingEnsembleRegressor of ensemblevoting.py and the
+    StackingRegressor of EnhancedHousePriceModel. The {'model',
+    'feature_names'} artifacts of train_models.py are rejected: those models
+    were fitted after outlier removal, interaction features and Yeo-Johnson
+    transforms, so raw rows would get meaningless teacher predictions.
+
+    Returns:
+        tuple: (model, feature names or None if the model has none)
+
+    Raises:
+        ValueError: For a {'model', 'feature_names'} artifact
+    """
+    # ensemblevoting.py pickles its ensemble from __main__
+    import __main__
+    from ensemblevoting import VotingEnsembleRegressor
+    if not hasattr(__main__, 'VotingEnsembleRegressor'):
+        __main__.VotingEnsembleRegressor = VotingEnsembleRegressor
+
+    model_data = joblib.load(model_path)
+    if isinstance(model_data, dict) and 'model' in model_data:
+        raise ValueError(
+            f"{model_path} is a {{'model', 'feature_names'}} artifact ({model_data.get('model_name')}), "
+            "whose model expects preprocessed features; distill a raw-input ensemble such as "
+            "models/voting_ensemble.joblib instead"
+        )
+    feature_names = getattr(model_data, 'feature_names_in_', None)
+    return model_data, list(feature_names) if feature_names is not None else None
+
+
+def perturb(X, copies, noise, random_state=42):
+    """
+    Synthetic rows around the training data
+
+    Continuous columns get Gaussian noise of noise * column std, rounded
+    back to whole numbers where the column only holds whole numbers.
+    Discrete columns take the value of a random other row with probability
+    noise. Everything stays within the observed column ranges.
+
+    Args:
+        X (pd.DataFrame): Training features
+        copies (int): Perturbed copies of the training rows
+        noise (float): Perturbation strength
+
+    Returns:
+        pd.DataFrame: copies * len(X) synthetic rows
+    """
+    rng = np.random.default_rng(random_state)
+    values = X.to_numpy(dtype=float)
+    low, high = values.min(axis=0), values.max(axis=0)
+    std = values.std(axis=0)
+    whole = np.all(values == np.round(values), axis=0)
+    discrete = X.nunique().to_numpy() <= MAX_DISCRETE_LEVELS
+
+    synthetic = []
+    for _ in range(copies):
+        rows = values + rng.standard_normal(values.shape) * std * noise * ~discrete
+        rows[:, whole] = np.round(rows[:, whole])
+
+        swap = (rng.random(values.shape) < noise) & discrete
+        donors = values[rng.integers(0, len(values), len(values))]
+        rows[swap] = donors[swap]
+        synthetic.append(np.clip(rows, low, high))
+
+    return pd.DataFrame(np.vstack(synthetic), columns=X.columns)
+
+
+def make_student():
+    """Shallow gradient boosting model, which the API can also compile"""
+    return GradientBoostingRegressor(
+        n_estimators=300,
+        learning_rate=0.1,
+        max_depth=4,
+        min_samples_leaf=5,
+        subsample=0.8,
+        random_state=42
+    )
+
+
+def distill(teacher, X_train, copies=3, noise=0.05):
+    """
+    Train a student model on the teacher's predictions
+
+    Args:
+        teacher: Fitted model to imitate
+        X_train (pd.DataFrame): Training features
+        copies (int): Perturbed copies of the training rows added
+        noise (float): Perturbation strength, see perturb()
+
+    Returns:
+        Fitted student model
+    """
+    X_distill = pd.concat([X_train.reset_index(drop=True), perturb(X_train, copies, noise)],
+                          ignore_index=True)
+    X_distill = X_distill.astype(X_train.dtypes.to_dict())
+    print(f"Labelling {len(X_distill)} rows ({len(X_train)} training, "
+          f"{len(X_distill) - len(X_train)} synthetic) with the teacher...")
+    y_soft = teacher.predict(X_distill)
+
+    print("Training student model...")
+    student = make_student()
+    student.fit(X_distill, y_soft)
+    return student
+
+
+def median_latency_ms(model, X, repeats):
+    model.predict(X)  # warm up
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def compare(teacher, student, X_test, y_test, repeats=50):
+    """
+    Accuracy, fidelity, latency and size of student vs teacher
+
+    Returns:
+        dict: Per model r2, rmse, single-row and 1000-row latency (ms) and
+            pickled size (MB); plus the student's R2 against the teacher
+    """
+    batch = X_test.iloc[:1000]
+    report = {}
+    for name, model in [('teacher', teacher), ('student', student)]:
+        predictions = model.predict(X_test)
+        report[name] = {
+            'r2': r2_score(y_test, predictions),
+            'rmse': np.sqrt(mean_squared_error(y_test, predictions)),
+            'single_row_ms': median_latency_ms(model, X_test.iloc[:1], repeats),
+            'batch_1000_ms': median_latency_ms(model, batch, max(repeats // 10, 3)),
+            'size_mb': len(pickle.dumps(model)) / (1024 * 1024)
+        }
+    report['fidelity_r2'] = r2_score(teacher.predict(X_test), student.predict(X_test))
+    return report
+
+
+def print_report(report):
+    print(f"\n{'':<10} {'R²':>8} {'RMSE':>12} {'1 row ms':>10} {'1000 rows ms':>13} {'size MB':>9}")
+    for name in ('teacher', 'student'):
+        r = report[name]
+        print(f"{name:<10} {r['r2']:>8.4f} {r['rmse']:>12.2f} {r['single_row_ms']:>10.2f} "
+              f"{r['batch_1000_ms']:>13.2f} {r['size_mb']:>9.2f}")
+    teacher, student = report['teacher'], report['student']
+    print(f"\nR² loss: {teacher['r2'] - student['r2']:.4f}, student vs teacher R²: {report['fidelity_r2']:.4f}")
+    print(f"Latency: {teacher['single_row_ms'] / student['single_row_ms']:.1f}x faster per row, "
+          f"{teacher['batch_1000_ms'] / student['batch_1000_ms']:.1f}x per 1000 rows")
+    print(f"Size: {teacher['size_mb'] / student['size_mb']:.1f}x smaller")
+
+
+def save_student(student, feature_names, teacher_path, report, output_path):
+    """
+    Save in the {'model', 'feature_names'} format the API loads
+
+    The model is registered but not promoted; make it the production model
+    with `python model_registry.py --promote <version>`.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    joblib.dump({
+        'model': student,
+        'feature_names': list(feature_names),
+        'timestamp': timestamp,
+        'model_name': 'Distilled',
+        'teacher': os.path.basename(teacher_path),
+        'distillation': report
+    }, output_path)
+    print(f"\nDistilled model saved to: {output_path}")
+
+    ModelRegistry(os.path.dirname(os.path.abspath(output_path))).register(
+        output_path, 'Distilled', feature_names=feature_names,
+        metrics={key: report['student'][key] for key in ('r2', 'rmse')},
+        teacher=os.path.basename(teacher_path)
+    )
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    ml_model_dir = os.path.dirname(script_dir)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    parser = argparse.ArgumentParser(description="Distill an ensemble into a single compact serving model")
+    parser.add_argument('teacher_path', help="Saved ensemble, e.g. models/voting_ensemble.joblib")
+    parser.add_argument('--data', default=os.path.join(ml_model_dir, 'dataset', 'House_Price_India.csv'),
+                        help="CSV the teacher was trained on, with a Price column")
+    parser.add_argument('--output', default=os.path.join(ml_model_dir, 'models', f'distilled_{timestamp}.joblib'),
+                        help="Output artifact")
+    parser.add_argument('--copies', type=int, default=3, help="Perturbed copies of the training rows")
+    parser.add_argument('--noise', type=float, default=0.05, help="Perturbation strength")
+    args = parser.parse_args()
+
+    try:
+        teacher, feature_names = load_teacher(args.teacher_path)
+
+        data = load_dataset(args.data)
+        X = data.drop('Price', axis=1)
+        y = data['Price']
+        if feature_names is not None:
+            X = X[feature_names]
+
+        # The split ensemblevoting.py trains on, so the test rows are new to the teacher
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+        student = distill(teacher, X_train, args.copies, args.noise)
+        report = compare(teacher, student, X_test, y_test)
+        print_report(report)
+        save_student(student, X.columns, args.teacher_path, report, args.output)
+
+    except Exception as e:
+        print(f"\nError: {str(e)}")
+        sys.exit(1)
@@ -11,6 +11,8 @@ from sklearn.impute import SimpleImputer
 import joblib
 import os
 
+from model_registry import ModelRegistry
+
 class EnhancedHousePriceModel:
     def __init__(self):
         self.model = None
@@ -149,6 +151,11 @@ class EnhancedHousePriceModel:
             joblib.dump(self.model, path)
             print(f"Model saved successfully to {path}")
             
+            ModelRegistry(os.path.dirname(path)).register(
+                path, 'Enhanced_Stacking',
+                feature_names=getattr(self.model, 'feature_names_in_', None)
+            )
+            
         except Exception as e:
             print(f"Error saving model: {str(e)}")
             raise
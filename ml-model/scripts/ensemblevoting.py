@@ -2,11 +2,51 @@ import pandas as pd
 import numpy as np
 from sklearn.base import BaseEstimator, RegressorMixin
 import joblib
+import logging
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.metrics import mean_squared_error, r2_score
 import time
 
+from model_registry import ModelRegistry
+
+
+logger = logging.getLogger(__name__)
+
+# Guards the lazy creation of an ensemble's member prediction threads
+_POOL_LOCK = threading.Lock()
+
+
+def rank_weights(predictions):
+    """
+    Inverse-MSE weights of members against the mean of the other members
+    
+    The leave-one-out mean of member i is (S - p_i) / (M - 1), with S the
+    sum over all M members, so p_i minus that mean is (M p_i - S) / (M - 1).
+    All members are handled at once from one sum, without removing each
+    member from a copy of the predictions.
+    
+    Args:
+        predictions: Array of shape (members, rows)
+        
+    Returns:
+        np.array: Weights summing to 1, lower disagreement = higher weight
+    """
+    predictions = np.asarray(predictions, dtype=float)
+    n_members = len(predictions)
+    if n_members == 1:
+        return np.ones(1)
+    
+    deviations = predictions * n_members
+    deviations -= predictions.sum(axis=0)
+    mse_values = np.einsum('ij,ij->i', deviations, deviations) / (predictions.shape[1] * (n_members - 1) ** 2)
+    
+    # Convert MSE to weights (lower MSE = higher weight)
+    inv_mse = 1 / (mse_values + 1e-10)  # Add small constant to avoid division by zero
+    return inv_mse / np.sum(inv_mse)
+
 
 class VotingEnsembleRegressor(BaseEstimator, RegressorMixin):
     """
@@ -14,7 +54,7 @@ class VotingEnsembleRegressor(BaseEstimator, RegressorMixin):
     It can use weighted average, median, or rank-based voting.
     """
     
-    def __init__(self, models=None, weights=None, method='weighted'):
+    def __init__(self, models=None, weights=None, method='weighted', prefit=False, n_jobs=None):
         """
         Initialize the voting ensemble.
         
@@ -22,26 +62,70 @@ class VotingEnsembleRegressor(BaseEstimator, RegressorMixin):
             models: List of (name, model) tuples
             weights: List of weights for each model (used with weighted method)
             method: Voting method ('weighted', 'median', or 'rank')
+            prefit: Members are already trained; fit() only marks the
+                ensemble as fitted instead of training them again
+            n_jobs: Threads predicting with members concurrently (None or 1
+                for one after another, -1 for one per member)
         """
         self.models = models if models else []
-        self.weights = weights if weights else None
+        self.weights = weights
         self.method = method
+        self.prefit = prefit
+        self.n_jobs = n_jobs
         self.is_fitted = False
         
+    def __getstate__(self):
+        # Threads cannot be pickled; a loaded ensemble starts its own
+        state = super().__getstate__()
+        state.pop('_pool', None)
+        return state
+    
+    def __setstate__(self, state):
+        # Ensembles saved before prefit and n_jobs existed
+        state.setdefault('prefit', False)
+        state.setdefault('n_jobs', None)
+        super().__setstate__(state)
+        
     def fit(self, X, y):
-        """Fit all models in the ensemble"""
+        """Fit all models in the ensemble, or adopt them as they are with prefit"""
         if not self.models:
             raise ValueError("No models provided to the ensemble")
-            
-        print(f"\n🔄 Training Voting Ensemble with {len(self.models)} models...")
         
-        for name, model in self.models:
-            print(f"Training {name}...")
-            model.fit(X, y)
+        if self.prefit:
+            logger.info("Using %d prefit ensemble members", len(self.models))
+        else:
+            logger.info("Training voting ensemble with %d models", len(self.models))
+            for name, model in self.models:
+                logger.info("Training %s", name)
+                model.fit(X, y)
             
         self.is_fitted = True
         return self
     
+    def _member_pool(self):
+        """Thread pool for concurrent member predictions, or None to run them in turn"""
+        threads = len(self.models) if self.n_jobs == -1 else (self.n_jobs or 1)
+        if min(threads, len(self.models)) <= 1:
+            return None
+        pool = getattr(self, '_pool', None)
+        if pool is None:
+            with _POOL_LOCK:
+                pool = getattr(self, '_pool', None)
+                if pool is None:
+                    pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='ensemble')
+                    self._pool = pool
+        return pool
+    
+    @staticmethod
+    def _member_predict(member, X):
+        """Prediction of one (name, model) member, or None if it fails"""
+        name, model = member
+        try:
+            return model.predict(X)
+        except Exception as e:
+            logger.warning("Ensemble member %s failed to predict: %s", name, str(e))
+            return None
+    
     def predict(self, X):
         """
         Make predictions using all models and combine them 
@@ -49,19 +133,18 @@ class VotingEnsembleRegressor(BaseEstimator, RegressorMixin):
         """
         if not self.is_fitted:
             raise ValueError("Models need to be fitted before prediction")
-            
-        predictions = []
-        model_names = []
         
-        # Collect predictions from all models
-        for name, model in self.models:
-            try:
-                y_pred = model.predict(X)
-                predictions.append(y_pred)
-                model_names.append(name)
-                print(f"Used {name} for prediction")
-            except Exception as e:
-                print(f"Error with {name} prediction: {str(e)}")
+        # Collect predictions from all models; tree libraries release the
+        # GIL while predicting, so members run in parallel in threads
+        pool = self._member_pool()
+        if pool is None:
+            results = [self._member_predict(member, X) for member in self.models]
+        else:
+            results = list(pool.map(self._member_predict, self.models, [X] * len(self.models)))
+        
+        used = [i for i, y_pred in enumerate(results) if y_pred is not None]
+        predictions = [results[i] for i in used]
+        model_names = [self.models[i][0] for i in used]
         
         if not predictions:
             raise ValueError("No valid predictions from any model")
@@ -70,41 +153,32 @@ class VotingEnsembleRegressor(BaseEstimator, RegressorMixin):
         predictions = np.array(predictions)
         
         # Apply the selected voting method
-        if self.method == 'weighted' and self.weights:
-            # Normalize weights to sum to 1
-            weights = np.array(self.weights) / sum(self.weights)
+        if self.method == 'weighted' and self.weights is not None:
+            # Normalize the weights of the members that predicted to sum to 1
+            weights = np.asarray(self.weights, dtype=float)[used]
+            weights = weights / weights.sum()
             # Weighted average of predictions
             final_pred = np.average(predictions, axis=0, weights=weights)
-            print(f"Applied weighted voting with weights: {list(zip(model_names, weights))}")
             
         elif self.method == 'median':
             # Median of predictions (robust to outliers)
             final_pred = np.median(predictions, axis=0)
-            print("Applied median voting")
             
         elif self.method == 'rank':
             # Rank-based weighted average (gives more weight to models that are more confident)
-            # Calculate mean squared error for each model's prediction
-            mse_values = []
-            for i in range(len(predictions)):
-                # Calculate MSE relative to the average prediction
-                avg_pred = np.mean(np.delete(predictions, i, axis=0), axis=0)
-                mse = np.mean((predictions[i] - avg_pred) ** 2)
-                mse_values.append(mse)
-            
-            # Convert MSE to weights (lower MSE = higher weight)
-            inv_mse = 1 / (np.array(mse_values) + 1e-10)  # Add small constant to avoid division by zero
-            weights = inv_mse / np.sum(inv_mse)
+            weights = rank_weights(predictions)
             
             # Apply weighted average using inverse MSE weights
             final_pred = np.average(predictions, axis=0, weights=weights)
-            print(f"Applied rank-based voting with weights: {list(zip(model_names, weights))}")
             
         else:
             # Default to simple average
             final_pred = np.mean(predictions, axis=0)
-            print("Applied simple average voting")
         
+        logger.debug(
+            "Ensemble prediction",
+            extra={'method': self.method, 'members': model_names, 'rows': len(final_pred)}
+        )
         return final_pred
 
 
@@ -149,15 +223,16 @@ def train_voting_ensemble(X_train, y_train, X_test, y_test):
     # Start timer
     start_time = time.time()
     
-    # Train individual models
+    # Train individual models; each trainer keeps the out-of-fold
+    # predictions of its cross-validation
     print("\n🔍 Training Linear Regression...")
-    lr_model = train_linear_regression(X_train, y_train)
+    lr_model, lr_cv = train_linear_regression(X_train, y_train, return_cv=True)
     
     print("\n🔍 Training Random Forest...")
-    rf_model = train_random_forest(X_train, y_train)
+    rf_model, rf_cv = train_random_forest(X_train, y_train, return_cv=True)
     
     print("\n🔍 Training XGBoost...")
-    xgb_model = train_xgboost(X_train, y_train)
+    xgb_model, xgb_cv = train_xgboost(X_train, y_train, return_cv=True)
     
     # Create model list for ensemble
     models = [
@@ -166,7 +241,24 @@ def train_voting_ensemble(X_train, y_train, X_test, y_test):
         ('xgboost', xgb_model)
     ]
     
-    # Evaluate individual models first
+    # Calculate performance-based weights from out-of-fold predictions, so
+    # the test set stays unseen until the final evaluation
+    r2_values = np.array([lr_cv.oof_r2, rf_cv.oof_r2, xgb_cv.oof_r2])
+    # Ensure all values are positive and add small constant
+    adjusted_r2 = r2_values - min(0, np.min(r2_values)) + 0.01
+    weights = adjusted_r2 / np.sum(adjusted_r2)
+    
+    print(f"\nModel weights based on out-of-fold performance: {list(zip(['Linear', 'Random Forest', 'XGBoost'], weights))}")
+    
+    # The members are already fitted on all training rows
+    ensemble = VotingEnsembleRegressor(models=models, weights=weights, method='weighted', prefit=True)
+    ensemble.fit(X_train, y_train)
+    
+    # End timer
+    training_time = time.time() - start_time
+    print(f"\nTotal training time: {training_time:.2f} seconds")
+    
+    # Evaluate individual models
     lr_pred = lr_model.predict(X_test)
     lr_r2 = r2_score(y_test, lr_pred)
     lr_rmse = np.sqrt(mean_squared_error(y_test, lr_pred))
@@ -179,22 +271,6 @@ def train_voting_ensemble(X_train, y_train, X_test, y_test):
     xgb_r2 = r2_score(y_test, xgb_pred)
     xgb_rmse = np.sqrt(mean_squared_error(y_test, xgb_pred))
     
-    # Calculate performance-based weights
-    r2_values = np.array([lr_r2, rf_r2, xgb_r2])
-    # Ensure all values are positive and add small constant
-    adjusted_r2 = r2_values - min(0, np.min(r2_values)) + 0.01
-    weights = adjusted_r2 / np.sum(adjusted_r2)
-    
-    print(f"\nModel weights based on performance: {list(zip(['Linear', 'Random Forest', 'XGBoost'], weights))}")
-    
-    # Create and train ensemble with optimized weights
-    ensemble = VotingEnsembleRegressor(models=models, weights=weights, method='weighted')
-    ensemble.fit(X_train, y_train)
-    
-    # End timer
-    training_time = time.time() - start_time
-    print(f"\nTotal training time: {training_time:.2f} seconds")
-    
     # Evaluate ensemble
     ensemble_pred = ensemble.predict(X_test)
     ensemble_r2 = r2_score(y_test, ensemble_pred)
@@ -210,8 +286,8 @@ def train_voting_ensemble(X_train, y_train, X_test, y_test):
     return ensemble
 
 
-def save_ensemble(ensemble, output_path):
-    """Save the trained ensemble model"""
+def save_ensemble(ensemble, output_path, feature_names=None, metrics=None):
+    """Save the trained ensemble model and add it to the model registry"""
     try:
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -220,6 +296,10 @@ def save_ensemble(ensemble, output_path):
         joblib.dump(ensemble, output_path)
         print(f"\nEnsemble model saved to: {output_path}")
         
+        ModelRegistry(os.path.dirname(output_path)).register(
+            output_path, 'Voting_Ensemble', metrics=metrics, feature_names=feature_names
+        )
+        
     except Exception as e:
         print(f"Error saving ensemble model: {str(e)}")
 
@@ -235,8 +315,9 @@ if __name__ == "__main__":
         output_path = os.path.join(ml_model_dir, 'models', 'voting_ensemble.joblib')
         
         # Load data
+        from dataset_cache import load_dataset
         print("Loading dataset...")
-        data = pd.read_csv(data_path)
+        data = load_dataset(data_path)
         
         # Separate features and target
         X = data.drop('Price', axis=1)
@@ -252,7 +333,11 @@ if __name__ == "__main__":
         ensemble = train_voting_ensemble(X_train, y_train, X_test, y_test)
         
         # Save trained ensemble
-        save_ensemble(ensemble, output_path)
+        ensemble_pred = ensemble.predict(X_test)
+        save_ensemble(ensemble, output_path, feature_names=X.columns, metrics={
+            'r2': r2_score(y_test, ensemble_pred),
+            'rmse': np.sqrt(mean_squared_error(y_test, ensemble_pred))
+        })
         
         print("\n✅ Ensemble training complete!")
         
@@ -0,0 +1,214 @@
+# Canonical version of ml/src/model_registry.py: ml-model/scripts and ml/src are
+# deployed separately, each from its own directory with flat imports, so
+# they share no package to import one module from. Make changes here first,
+# then port them to the copy.
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are not serialized
+    fcntl = None
+
+MANIFEST_NAME = 'registry.json'
+
+# Bump when the manifest layout changes
+SCHEMA_VERSION = 1
+
+CHUNK_BYTES = 1 << 20
+
+
+def file_sha256(path):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _to_json(value):
+    """json.dump fallback for NumPy scalars and arrays"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+class ModelRegistry:
+    """
+    Manifest of the saved models in a models directory
+
+    registry.json records every registered version (file path relative to
+    the directory, checksum, size, metrics, feature names) and which one is
+    in production, so the APIs find their model with one small file read
+    instead of listing the directory. The manifest is rewritten atomically
+    (temp file, then rename) and writers take a lock file, so concurrent
+    trainers never lose each other's entries and readers never see a
+    partial file. Because paths are relative, the directory can be copied
+    elsewhere (e.g. to api/models) as a whole.
+    """
+
+    def __init__(self, models_dir):
+        self.models_dir = models_dir
+        self.manifest_path = os.path.join(models_dir, MANIFEST_NAME)
+
+    def read(self):
+        """The manifest, or an empty one if none has been written yet"""
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'schema_version': SCHEMA_VERSION, 'production': None, 'next_sequence': 1, 'versions': {}}
+
+    @contextlib.contextmanager
+    def _update(self):
+        """Read, modify and atomically rewrite the manifest under the lock"""
+        os.makedirs(self.models_dir, exist_ok=True)
+        with open(self.manifest_path + '.lock', 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            manifest = self.read()
+            yield manifest
+            temp_path = f'{self.manifest_path}.{os.getpid()}.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump(manifest, f, indent=2, default=_to_json)
+            os.replace(temp_path, self.manifest_path)
+
+    def register(self, path, model_name, metrics=None, feature_names=None, production=False,
+                 version=None, **extra):
+        """
+        Add a saved model file to the registry
+
+        A file holds one version at a time: entries already pointing to the
+        same path are replaced.
+
+        Args:
+            path (str): Model file inside the models directory
+            model_name (str): Model family, e.g. 'XGBoost'
+            metrics (dict): Evaluation metrics
+            feature_names (list): Feature columns the model expects, in order
+            production (bool): Make this the production version
+            version (str): Version id (default: the file name without extension)
+            **extra: Any other JSON-serializable details to record
+
+        Returns:
+            dict: The new entry
+        """
+        relative_path = os.path.relpath(path, self.models_dir)
+        if version is None:
+            version = os.path.splitext(os.path.basename(path))[0]
+        entry = {
+            'version': version,
+            'model_name': model_name,
+            'path': relative_path,
+            'sha256': file_sha256(path),
+            'size_bytes': os.path.getsize(path),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'metrics': dict(metrics or {}),
+            'feature_names': list(feature_names) if feature_names is not None else None
+        }
+        entry.update(extra)
+
+        with self._update() as manifest:
+            for old_version, old_entry in list(manifest['versions'].items()):
+                if old_entry['path'] == relative_path and old_version != version:
+                    del manifest['versions'][old_version]
+                    if manifest['production'] == old_version:
+                        manifest['production'] = None
+            entry['sequence'] = manifest['next_sequence']
+            manifest['next_sequence'] += 1
+            manifest['versions'][version] = entry
+            if production:
+                manifest['production'] = version
+        return entry
+
+    def set_production(self, version):
+        """Point production at a registered version"""
+        with self._update() as manifest:
+            if version not in manifest['versions']:
+                raise KeyError(f"Unknown model version: {version}")
+            manifest['production'] = version
+
+    def remove(self, version, delete_file=True):
+        """
+        Drop a version from the registry, and its file unless delete_file is False
+
+        The production version cannot be removed.
+        """
+        with self._update() as manifest:
+            if manifest['production'] == version:
+                raise ValueError(f"Cannot remove the production version {version}")
+            entry = manifest['versions'].pop(version, None)
+        if entry is not None and delete_file:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.path_of(entry))
+        return entry
+
+    def get(self, version):
+        return self.read()['versions'].get(version)
+
+    def production(self):
+        """Entry of the production version, or None"""
+        manifest = self.read()
+        version = manifest['production']
+        return manifest['versions'].get(version) if version is not None else None
+
+    def versions(self, model_name=None):
+        """Entries newest first, optionally of one model family"""
+        entries = [entry for entry in self.read()['versions'].values()
+                   if model_name is None or entry['model_name'] == model_name]
+        return sorted(entries, key=lambda entry: entry['sequence'], reverse=True)
+
+    def latest(self, model_name=None):
+        """Most recently registered entry, or None"""
+        entries = self.versions(model_name)
+        return entries[0] if entries else None
+
+    def path_of(self, entry):
+        """Absolute path of an entry's model file"""
+        return os.path.join(os.path.abspath(self.models_dir), entry['path'])
+
+    def verify(self, version):
+        """True if the version's file still has the registered size and checksum"""
+        entry = self.get(version)
+        if entry is None:
+            raise KeyError(f"Unknown model version: {version}")
+        path = self.path_of(entry)
+        return (os.path.exists(path) and os.path.getsize(path) == entry['size_bytes']
+                and file_sha256(path) == entry['sha256'])
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    default_dir = os.path.join(os.path.dirname(script_dir), 'models')
+
+    parser = argparse.ArgumentParser(description="List or manage the registered models")
+    parser.add_argument('--models-dir', default=default_dir, help="Directory holding registry.json")
+    parser.add_argument('--promote', metavar='VERSION', help="Make VERSION the production model")
+    parser.add_argument('--verify', action='store_true', help="Check every file against its checksum")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.models_dir)
+    if args.promote:
+        try:
+            registry.set_production(args.promote)
+        except KeyError as e:
+            parser.error(str(e.args[0]))
+        print(f"Production model: {args.promote}")
+
+    production = registry.read()['production']
+    print(f"{'':2}{'version':<40} {'model':<18} {'size MB':>8} {'r2':>7}  created")
+    for entry in registry.versions():
+        marker = '* ' if entry['version'] == production else '  '
+        r2 = entry['metrics'].get('r2')
+        r2 = f"{r2:>7.4f}" if isinstance(r2, (int, float)) else f"{'':>7}"
+        status = ''
+        if args.verify:
+            status = '  ok' if registry.verify(entry['version']) else '  MISMATCH'
+        print(f"{marker}{entry['version']:<40} {entry['model_name']:<18} "
+              f"{entry['size_bytes'] / (1024 * 1024):>8.2f} {r2}  {entry['created_at']}{status}")
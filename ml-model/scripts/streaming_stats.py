@@ -0,0 +1,115 @@
+import numpy as np
+
+
+class RunningMoments:
+    """
+    Per-column count, mean and 2nd/3rd central moments, merged chunk by chunk
+
+    Chunks are combined with the pairwise update of Chan et al., so the
+    result matches a single pass over all rows up to floating point error.
+    Missing values are skipped column by column.
+    """
+
+    def __init__(self, n_columns):
+        self.count = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.m3 = np.zeros(n_columns)
+
+    def update(self, values):
+        """
+        Add a chunk
+
+        Args:
+            values (np.array): Shape (rows, columns)
+        """
+        present = ~np.isnan(values)
+        n_b = present.sum(axis=0).astype(float)
+        if not n_b.any():
+            return
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_b = np.where(n_b > 0, np.nansum(values, axis=0) / n_b, 0.0)
+        centered = np.where(present, values - mean_b, 0.0)
+        m2_b = np.einsum('ij,ij->j', centered, centered)
+        m3_b = np.einsum('ij,ij,ij->j', centered, centered, centered)
+
+        n_a = self.count
+        n = n_a + n_b
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = mean_b - self.mean
+            mean = self.mean + np.where(n > 0, delta * n_b / n, 0.0)
+            m2 = self.m2 + m2_b + np.where(n > 0, delta ** 2 * n_a * n_b / n, 0.0)
+            m3 = (self.m3 + m3_b
+                  + np.where(n > 0, delta ** 3 * n_a * n_b * (n_a - n_b) / n ** 2, 0.0)
+                  + np.where(n > 0, 3 * delta * (n_a * m2_b - n_b * self.m2) / n, 0.0))
+        self.count, self.mean, self.m2, self.m3 = n, mean, m2, m3
+
+    def std(self):
+        """Population standard deviation (ddof=0), as scipy.stats.zscore uses"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(self.m2 / self.count)
+
+    def skew(self):
+        """Bias-adjusted sample skewness, as pandas Series.skew computes it"""
+        n = self.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            g1 = (self.m3 / n) / (self.m2 / n) ** 1.5
+            skew = np.sqrt(n * (n - 1)) / (n - 2) * g1
+        # pandas: fewer than 3 values -> NaN, constant column -> 0
+        skew = np.where(self.m2 > 0, skew, 0.0)
+        return np.where(n >= 3, skew, np.nan)
+
+
+class RowReservoir:
+    """
+    Uniform random sample of at most `size` rows from a stream of chunks
+
+    Standard reservoir sampling (algorithm R), applied to a whole chunk at a
+    time. Quantiles read from the sample are within about
+    3 * sqrt(q * (1 - q) / size) in rank of the true ones (about 0.5% at the
+    median for the default 100,000 rows), and exact while the stream is no
+    longer than the reservoir.
+    """
+
+    def __init__(self, size=100000, random_state=42):
+        self.size = size
+        self.seen = 0
+        self.rows = None
+        self._filled = 0
+        self._rng = np.random.default_rng(random_state)
+
+    def update(self, values):
+        """
+        Offer a chunk of rows
+
+        Args:
+            values (np.array): Shape (rows, columns)
+        """
+        if self.rows is None:
+            self.rows = np.empty((self.size, values.shape[1]))
+        positions = self.seen + np.arange(len(values))
+        self.seen += len(values)
+
+        # Rows that still fit go in directly
+        fill = positions < self.size
+        n_fill = int(fill.sum())
+        self.rows[self._filled:self._filled + n_fill] = values[fill]
+        self._filled += n_fill
+
+        # Row t then replaces a random slot with probability size / (t + 1)
+        later = np.flatnonzero(~fill)
+        slots = self._rng.integers(0, positions[later] + 1)
+        accepted = slots < self.size
+        later, slots = later[accepted], slots[accepted]
+        # Within a chunk, the last row offered for a slot is the one kept
+        _, last = np.unique(slots[::-1], return_index=True)
+        keep = len(slots) - 1 - last
+        self.rows[slots[keep]] = values[later[keep]]
+
+    def sample(self):
+        """The sampled rows"""
+        return self.rows[:self._filled]
+
+    def quantile(self, q):
+        """Per-column quantiles of the sampled rows, ignoring missing values"""
+        return np.nanquantile(self.sample(), q, axis=0)
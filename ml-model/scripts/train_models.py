@@ -3,8 +3,16 @@ import numpy as np
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import mean_squared_error, r2_score
 import joblib
+import argparse
+import json
+import contextlib
+import io
+import multiprocessing
 import os
+import shutil
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 # Import all models and preprocessor
@@ -13,13 +21,15 @@ from RandomForest import train_random_forest
 from XGBoost import train_xgboost
 from ensemblevoting import train_voting_ensemble
 from data_preprocessing import DataPreprocessor
+from dataset_cache import load_dataset
+from model_registry import ModelRegistry
 
 def load_and_prepare_data(data_path):
     """Load and prepare the dataset using DataPreprocessor"""
     try:
         # Load data
         print("Loading dataset...")
-        data = pd.read_csv(data_path)
+        data = load_dataset(data_path)
         
         # Initialize preprocessor
         preprocessor = DataPreprocessor()
@@ -32,6 +42,7 @@ def load_and_prepare_data(data_path):
         if 'Price' in numeric_features:
             numeric_features.remove('Price')
         data = preprocessor.remove_outliers(data, numeric_features)
+        print(f"Outlier rows removed per column: {preprocessor.outlier_report()}")
         
         # Create interaction features
         data = preprocessor.create_interaction_features(data)
@@ -81,12 +92,41 @@ def evaluate_model(model, X_test, y_test, model_name):
         print(f"Error evaluating {model_name}: {str(e)}")
         return None
 
-def save_model(model, model_name, feature_names):
-    """Save the trained model with versioning"""
+def parse_compression(spec):
+    """
+    joblib compress argument for 'none', 'zlib:<level>' or 'lz4:<level>'
+    
+    Same as parse_compression in api/artifacts.py, which scripts cannot
+    import; keep the two in step.
+    
+    Raises:
+        ValueError: For an unknown method, or lz4 without the lz4 package
+    """
+    method, _, level = spec.partition(':')
+    if method == 'none':
+        return 0
+    if method not in ('zlib', 'lz4'):
+        raise ValueError(f"Unknown compression {spec!r}, expected none, zlib:<level> or lz4:<level>")
+    if method == 'lz4':
+        try:
+            import lz4.frame  # noqa: F401
+        except ImportError:
+            raise ValueError("lz4 compression needs the lz4 package (pip install lz4)")
+    return (method, int(level or 3))
+
+def save_model(model, model_name, feature_names, metrics=None, compression='zlib:3'):
+    """
+    Save the trained model with versioning and add it to the model registry
+    
+    Args:
+        compression (str): 'none', 'zlib:<level>' or 'lz4:<level>'; see
+            api/artifacts.py to compare the options on a saved model
+    """
     try:
         # Create models directory if it doesn't exist
         models_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models')
         os.makedirs(models_dir, exist_ok=True)
+        registry = ModelRegistry(models_dir)
         
         # Generate timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -101,32 +141,155 @@ def save_model(model, model_name, feature_names):
             'timestamp': timestamp,
             'model_name': model_name
         }
-        joblib.dump(model_data, model_path)
+        joblib.dump(model_data, model_path, compress=parse_compression(compression))
+        
+        print(f"\nModel saved to: {model_path} ({os.path.getsize(model_path) / (1024 * 1024):.2f} MB)")
+        
+        # Keep the hyperparameter search result next to the model it produced
+        tuning_report = getattr(model, 'tuning_report_', None)
+        if tuning_report is not None:
+            tuning_path = model_path[:-len('.joblib')] + '.tuning.json'
+            with open(tuning_path, 'w') as f:
+                json.dump(tuning_report, f, indent=2)
+            print(f"Tuning report saved to: {tuning_path}")
         
-        print(f"\nModel saved to: {model_path}")
+        # XGBoost is the best from comparison, so it becomes the production model
+        is_best = model_name == "XGBoost"
+        metrics = {key: value for key, value in (metrics or {}).items() if key != 'model_name'}
+        registry.register(model_path, model_name, metrics=metrics, feature_names=feature_names,
+                          production=is_best, timestamp=timestamp)
         
-        # Also save a copy with the best_model prefix if it's the best model
-        if model_name == "XGBoost":  # Since we know XGBoost is the best from comparison
+        # Also expose the best model under the best_model prefix, as a
+        # hardlink rather than a second copy where the filesystem allows
+        if is_best:
             best_model_path = os.path.join(models_dir, f'best_model_{timestamp}.joblib')
-            joblib.dump(model_data, best_model_path)
-            print(f"Best model saved to: {best_model_path}")
-        
-        # Clean up old versions (keep only the 3 most recent)
-        model_files = [f for f in os.listdir(models_dir) if f.startswith(model_name) and f.endswith('.joblib')]
-        if len(model_files) > 3:
-            # Sort by timestamp (newest first)
-            model_files.sort(reverse=True)
-            # Remove older versions
-            for old_file in model_files[3:]:
-                os.remove(os.path.join(models_dir, old_file))
-                print(f"Removed old model: {old_file}")
+            try:
+                os.link(model_path, best_model_path)
+            except OSError:
+                shutil.copy2(model_path, best_model_path)
+            print(f"Best model linked at: {best_model_path}")
+        
+        # Clean up old versions (keep only the 3 most recently registered)
+        production = registry.read()['production']
+        for old_entry in registry.versions(model_name)[3:]:
+            if old_entry['version'] == production:
+                continue
+            registry.remove(old_entry['version'])
+            print(f"Removed old model: {old_entry['path']}")
+            old_tuning = os.path.join(models_dir, old_entry['path'][:-len('.joblib')] + '.tuning.json')
+            if os.path.exists(old_tuning):
+                os.remove(old_tuning)
+        
+        return model_path
         
     except Exception as e:
         print(f"Error saving {model_name}: {str(e)}")
         raise  # Re-raise the exception to stop the training process
 
-def train_all_models():
+# Candidate models in training order: display name, name used for saved
+# files, trainer, and relative CPU demand used to split a core budget
+CANDIDATES = [
+    ("Linear Regression", "Linear_Regression", train_linear_regression, 1),
+    ("Random Forest", "Random_Forest", train_random_forest, 2),
+    ("XGBoost", "XGBoost", train_xgboost, 2)
+]
+
+def available_cpus():
+    """Cores this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def allocate_cores(weights, budget):
+    """
+    Split a core budget between jobs in proportion to their weights
+    
+    Every job gets at least one core; cores left after rounding down go to
+    the jobs with the largest remainders.
+    
+    Args:
+        weights (list): Relative CPU demand of each job
+        budget (int): Total cores
+        
+    Returns:
+        list: Cores per job, summing to max(budget, len(weights))
+    """
+    spare = max(budget - len(weights), 0)
+    shares = [spare * w / sum(weights) for w in weights]
+    cores = [1 + int(share) for share in shares]
+    leftover = spare - sum(int(share) for share in shares)
+    by_remainder = sorted(range(len(weights)), key=lambda i: shares[i] - int(shares[i]), reverse=True)
+    for i in by_remainder[:leftover]:
+        cores[i] += 1
+    return cores
+
+def _train_candidate(index, n_jobs, X_train, y_train, options):
+    """
+    Train one candidate in a worker process, limited to n_jobs cores
+    
+    Returns:
+        tuple: (trained model, seconds, captured output)
+    """
+    from threadpoolctl import threadpool_limits
+    
+    _, _, trainer, _ = CANDIDATES[index]
+    output = io.StringIO()
+    start = time.perf_counter()
+    # Caps BLAS and OpenMP pools too, so a worker never uses more threads
+    # than its share even inside libraries that ignore n_jobs
+    with threadpool_limits(limits=n_jobs), contextlib.redirect_stdout(output):
+        model = trainer(X_train, y_train, n_jobs=n_jobs, **options)
+    return model, time.perf_counter() - start, output.getvalue()
+
+def _train_parallel(X_train, y_train, cpu_budget, trainer_options):
+    """Train all candidates at once, one process each, within cpu_budget cores"""
+    if cpu_budget > available_cpus():
+        print(f"Warning: CPU budget {cpu_budget} exceeds the {available_cpus()} available cores")
+    cores = allocate_cores([weight for _, _, _, weight in CANDIDATES], cpu_budget)
+    print("\nTraining models in parallel:")
+    for (name, _, _, _), n_jobs in zip(CANDIDATES, cores):
+        print(f"  {name}: {n_jobs} core(s)")
+
+    # At most cpu_budget models run at a time when the budget is smaller
+    # than the number of models
+    workers = min(len(CANDIDATES), max(cpu_budget, 1))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [
+            pool.submit(_train_candidate, i, n_jobs, X_train, y_train, trainer_options.get(name, {}))
+            for i, ((name, _, _, _), n_jobs) in enumerate(zip(CANDIDATES, cores))
+        ]
+        # Output is printed per model, in training order
+        for (name, _, _, _), future in zip(CANDIDATES, futures):
+            model, seconds, output = future.result()
+            print(f"\nTraining {name}...")
+            print(output, end='')
+            yield name, model, seconds
+
+def _train_sequential(X_train, y_train, trainer_options):
+    """Train the candidates one after another, each using every core"""
+    for name, _, trainer, _ in CANDIDATES:
+        print(f"\nTraining {name}...")
+        start = time.perf_counter()
+        model = trainer(X_train, y_train, **trainer_options.get(name, {}))
+        yield name, model, time.perf_counter() - start
+
+def train_all_models(parallel=False, cpu_budget=None, tune_xgboost=False, tune_trials=27,
+                     compression='zlib:3'):
+    """
+    Train, evaluate and save every candidate model
+    
+    Args:
+        parallel (bool): Train the models concurrently in a process pool
+        cpu_budget (int): Cores shared by the parallel workers (default: all)
+        tune_xgboost (bool): Search XGBoost's parameters instead of using
+            the defaults; the search result is saved as <model>.tuning.json
+        tune_trials (int): Configurations tried by the search
+        compression (str): Compression of the saved models
+    """
     try:
+        # Reject a bad compression before spending time on training
+        parse_compression(compression)
+        
         # Get data path
         script_dir = os.path.dirname(os.path.abspath(__file__))
         ml_model_dir = os.path.dirname(script_dir)
@@ -138,37 +301,45 @@ def train_all_models():
         # Initialize results list
         results = []
         models = {}
+        timings = {}
+        file_names = {name: file_name for name, file_name, _, _ in CANDIDATES}
+        # Extra keyword arguments per trainer
+        trainer_options = {}
+        if tune_xgboost:
+            trainer_options["XGBoost"] = {'tune': True, 'tune_trials': tune_trials}
+        
+        start = time.perf_counter()
+        if parallel:
+            trained = _train_parallel(X_train, y_train, cpu_budget or available_cpus(), trainer_options)
+        else:
+            trained = _train_sequential(X_train, y_train, trainer_options)
         
-        # Train and evaluate Linear Regression
-        print("\nTraining Linear Regression...")
-        lr_model = train_linear_regression(X_train, y_train)
-        lr_results = evaluate_model(lr_model, X_test, y_test, "Linear Regression")
-        if lr_results:
-            results.append(lr_results)
-            models["Linear Regression"] = lr_model
-            save_model(lr_model, "Linear_Regression", feature_names)
-        
-        # Train and evaluate Random Forest
-        print("\nTraining Random Forest...")
-        rf_model = train_random_forest(X_train, y_train)
-        rf_results = evaluate_model(rf_model, X_test, y_test, "Random Forest")
-        if rf_results:
-            results.append(rf_results)
-            models["Random Forest"] = rf_model
-            save_model(rf_model, "Random_Forest", feature_names)
-        
-        # Train and evaluate XGBoost
-        print("\nTraining XGBoost...")
-        xgb_model = train_xgboost(X_train, y_train)
-        xgb_results = evaluate_model(xgb_model, X_test, y_test, "XGBoost")
-        if xgb_results:
-            results.append(xgb_results)
-            models["XGBoost"] = xgb_model
-            save_model(xgb_model, "XGBoost", feature_names)
+        # Evaluate and save each model as soon as it is trained
+        for name, model, seconds in trained:
+            timings[name] = seconds
+            model_results = evaluate_model(model, X_test, y_test, name)
+            if model_results:
+                results.append(model_results)
+                models[name] = model
+                save_model(model, file_names[name], feature_names, metrics=model_results,
+                           compression=compression)
+        wall_time = time.perf_counter() - start
+        
+        # Print timings
+        print("\nTraining Times:")
+        for name, seconds in timings.items():
+            print(f"  {name}: {seconds:.2f} s")
+        print(f"  Wall time (training, evaluation and saving): {wall_time:.2f} s")
+        if parallel:
+            # Each model's time is measured on its share of the cores, so their
+            # sum says nothing about a sequential run with every core; compare
+            # against the wall time of a run without --parallel instead
+            print("  Compare with the wall time of a run without --parallel for the speedup")
         
         # Print comparison
         print("\nModel Comparison:")
         results_df = pd.DataFrame(results)
+        results_df['train_seconds'] = results_df['model_name'].map(timings).round(2)
         results_df = results_df.sort_values('r2', ascending=False)
         print(results_df)
         
@@ -182,4 +353,20 @@ def train_all_models():
         sys.exit(1)
 
 if __name__ == "__main__":
-    train_all_models()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train and compare all candidate models")
+    parser.add_argument('--parallel', action='store_true', help="Train the models concurrently in a process pool")
+    parser.add_argument('--cpu-budget', type=int, default=None,
+                        help="Cores shared by the parallel workers (default: all available)")
+    parser.add_argument('--tune-xgboost', action='store_true',
+                        help="Tune XGBoost with successive halving and early stopping")
+    parser.add_argument('--tune-trials', type=int, default=27, help="Configurations tried when tuning XGBoost")
+    parser.add_argument('--compression', default='zlib:3',
+                        help="Compression of the saved models: none, zlib:<level> or lz4:<level>")
+    args = parser.parse_args()
+    try:
+        parse_compression(args.compression)
+    except ValueError as e:
+        parser.error(str(e))
+    train_all_models(parallel=args.parallel, cpu_budget=args.cpu_budget,
+                     tune_xgboost=args.tune_xgboost, tune_trials=args.tune_trials,
+                     compression=args.compression)
\ No newline at end of file
@@ -0,0 +1,136 @@
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+
+# Search space: parameter -> (scale, low, high)
+PARAM_SPACE = {
+    'learning_rate': ('log', 0.01, 0.3),
+    'max_depth': ('int', 3, 10),
+    'min_child_weight': ('log', 1.0, 10.0),
+    'gamma': ('uniform', 0.0, 0.5),
+    'subsample': ('uniform', 0.6, 1.0),
+    'colsample_bytree': ('uniform', 0.6, 1.0),
+    'reg_alpha': ('log', 1e-3, 1.0),
+    'reg_lambda': ('log', 0.1, 10.0)
+}
+
+
+def sample_configs(n_configs, random_state=42):
+    """Random configurations drawn from PARAM_SPACE"""
+    rng = np.random.default_rng(random_state)
+    configs = []
+    for _ in range(n_configs):
+        config = {}
+        for name, (scale, low, high) in PARAM_SPACE.items():
+            if scale == 'int':
+                config[name] = int(rng.integers(low, high + 1))
+            elif scale == 'log':
+                config[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+            else:
+                config[name] = float(rng.uniform(low, high))
+        configs.append(config)
+    return configs
+
+
+def rung_budgets(n_configs, max_rounds, eta):
+    """Boosting rounds per rung; each rung keeps 1/eta of the configs of the one before"""
+    n_rungs = int(math.log(n_configs, eta) + 1e-9) + 1
+    return [max(int(max_rounds / eta ** (n_rungs - 1 - i)), 1) for i in range(n_rungs)]
+
+
+def _run_trial(config, rounds, data, n_jobs, early_stopping_rounds, random_state):
+    """Train one configuration for up to `rounds` rounds, stopping early on the validation fold"""
+    X_fit, y_fit, X_val, y_val = data
+    # Each trial builds its own DMatrix, so concurrent trials share no state
+    dtrain = xgb.DMatrix(X_fit, label=y_fit, nthread=n_jobs)
+    dval = xgb.DMatrix(X_val, label=y_val, nthread=n_jobs)
+    params = dict(config, objective='reg:squarederror', eval_metric='rmse',
+                  nthread=n_jobs, seed=random_state)
+    booster = xgb.train(
+        params, dtrain,
+        num_boost_round=rounds,
+        evals=[(dval, 'validation')],
+        early_stopping_rounds=early_stopping_rounds,
+        verbose_eval=False
+    )
+    return {
+        'rmse': float(booster.best_score),
+        'n_estimators': int(booster.best_iteration) + 1,
+        'rounds_trained': int(booster.num_boosted_rounds())
+    }
+
+
+def successive_halving(X, y, n_configs=27, eta=3, max_rounds=2000, early_stopping_rounds=50,
+                       cpu_budget=None, validation_size=0.2, random_state=42):
+    """
+    Tune XGBoost with successive halving over boosting rounds
+
+    Every configuration is first trained with a small round budget; the best
+    1/eta move on to a budget eta times larger, until one is left at
+    max_rounds. Each trial stops early once the validation RMSE has not
+    improved for early_stopping_rounds rounds, and the round it peaked at
+    becomes its n_estimators. Trials of a rung run in parallel threads
+    (XGBoost releases the GIL), the cores split evenly between them.
+
+    Args:
+        X: Training features
+        y: Training target values
+        n_configs (int): Configurations sampled from PARAM_SPACE
+        eta (int): Halving rate
+        max_rounds (int): Round budget of the last rung
+        early_stopping_rounds (int): Patience on the validation fold
+        cpu_budget (int): Cores for the search (default: all available)
+        validation_size (float): Share of X held out for early stopping
+
+    Returns:
+        dict: best_params, n_estimators, validation_rmse, search_seconds,
+            boosting_rounds (all trials) and the per-rung history
+    """
+    start = time.perf_counter()
+    if cpu_budget is None:
+        cpu_budget = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        np.asarray(X, dtype=float), np.asarray(y, dtype=float),
+        test_size=validation_size, random_state=random_state
+    )
+    data = (X_fit, y_fit, X_val, y_val)
+
+    candidates = sample_configs(n_configs, random_state)
+    history = []
+    total_rounds = 0
+    for rounds in rung_budgets(n_configs, max_rounds, eta):
+        workers = max(min(len(candidates), cpu_budget), 1)
+        n_jobs = max(cpu_budget // workers, 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                lambda config: _run_trial(config, rounds, data, n_jobs, early_stopping_rounds, random_state),
+                candidates
+            ))
+        total_rounds += sum(result['rounds_trained'] for result in results)
+
+        ranked = sorted(zip(candidates, results), key=lambda pair: pair[1]['rmse'])
+        history.append({
+            'rounds': rounds,
+            'trials': len(candidates),
+            'best_rmse': ranked[0][1]['rmse']
+        })
+        print(f"Rung with {rounds} rounds: {len(candidates)} trials, best validation RMSE {ranked[0][1]['rmse']:.4f}")
+
+        best_config, best_result = ranked[0]
+        candidates = [config for config, _ in ranked[:max(len(candidates) // eta, 1)]]
+
+    return {
+        'best_params': best_config,
+        'n_estimators': best_result['n_estimators'],
+        'validation_rmse': best_result['rmse'],
+        'search_seconds': round(time.perf_counter() - start, 2),
+        'boosting_rounds': total_rounds,
+        'cpu_budget': cpu_budget,
+        'rungs': history
+    }
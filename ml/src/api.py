@@ -1,9 +1,17 @@
-from fastapi import FastAPI, HTTPException
+# Started before the other imports so the startup report covers them
+from startup import StartupTimer
+startup = StartupTimer()
+
+from fastapi import Depends, FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, validator
-from typing import Dict, Union, List
+from typing import Any, Dict, Optional, Union, List
 import uvicorn
 from service import HousePricePredictionService
+from batching import MicroBatcher
+from executor import InferenceExecutor
+from validation import FIELD_SPECS, PINCODE_LENGTH, is_half_step, validate_records
+import asyncio
 import logging
 import os
 from dotenv import load_dotenv
@@ -17,6 +25,7 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+startup.mark("imports")
 
 # Get allowed origins from environment variables or use defaults
 def get_allowed_origins() -> List[str]:
@@ -49,28 +58,116 @@ app.add_middleware(
 )
 
 # Initialize prediction service
-prediction_service = HousePricePredictionService()
+prediction_service = HousePricePredictionService(
+    compile_model=os.getenv("COMPILED_MODEL", "false").lower() in ("1", "true", "yes"),
+    cache_size=int(os.getenv("PREDICTION_CACHE_SIZE", "10000")),
+    cache_ttl=float(os.getenv("PREDICTION_CACHE_TTL", "600"))
+)
+startup.mark("model_load")
+
+# Pay one-off costs (lazy imports, allocations) before the first request
+try:
+    prediction_service.warm_up()
+except Exception as e:
+    logger.warning(f"Model warmup failed: {str(e)}")
+startup.mark("warmup")
+startup.finish()
+logger.info(f"Startup took {startup.total * 1000:.0f} ms: {startup.report()['phases_ms']}")
+
+# Upper bound on the number of houses accepted by /predict/batch
+MAX_BATCH_HOUSES = int(os.getenv("MAX_BATCH_HOUSES", "50000"))
+
+# Predictions are CPU-bound; run them on a pool ('thread' or 'process') so
+# the event loop stays responsive. 'none' runs them inline.
+# 'process' loads the model once per worker on top of the copy in this
+# process: N+1 copies in memory for INFERENCE_WORKERS=N (default: one per
+# CPU). Each worker also has its own PREDICTION_CACHE_SIZE entry cache.
+executor = None
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread").lower()
+if INFERENCE_EXECUTOR != "none":
+    executor = InferenceExecutor(
+        prediction_service,
+        kind=INFERENCE_EXECUTOR,
+        max_workers=int(os.getenv("INFERENCE_WORKERS", "0")) or None
+    )
+
+# Optional micro-batching of concurrent /predict calls
+batcher = None
+if os.getenv("MICRO_BATCHING", "false").lower() in ("1", "true", "yes"):
+    batcher = MicroBatcher(
+        prediction_service,
+        max_batch_size=int(os.getenv("MICRO_BATCH_MAX_SIZE", "64")),
+        max_wait_ms=float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "2")),
+        executor=executor
+    )
+
+# Seconds between checks for a new model file (0 disables hot reload by file watch)
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+
+@app.on_event("startup")
+async def start_batcher():
+    if batcher is not None:
+        await batcher.start()
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    if batcher is not None:
+        await batcher.stop()
+
+# Registered after the batcher so its in-flight batches drain before the pool stops
+@app.on_event("startup")
+async def start_executor():
+    if executor is not None:
+        await asyncio.get_running_loop().run_in_executor(None, executor.start)
+
+@app.on_event("shutdown")
+async def stop_executor():
+    if executor is not None:
+        executor.shutdown()
+
+@app.on_event("startup")
+async def start_model_watcher():
+    if MODEL_WATCH_INTERVAL > 0:
+        prediction_service.start_watching(MODEL_WATCH_INTERVAL)
+
+@app.on_event("shutdown")
+async def stop_model_watcher():
+    prediction_service.stop_watching()
+
+def require_admin(authorization: Optional[str] = Header(None)):
+    """Admin endpoints are off unless ADMIN_TOKEN is set, then need it as a bearer token"""
+    token = os.getenv("ADMIN_TOKEN")
+    if not token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if authorization != f"Bearer {token}":
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def spec_field(name: str):
+    """Pydantic field with the description and bounds from validation.FIELD_SPECS"""
+    spec = FIELD_SPECS[name]
+    return Field(..., description=spec.description, gt=spec.gt, ge=spec.ge, le=spec.le)
 
 class HousePredictionRequest(BaseModel):
-    pincode: str = Field(..., description="6-digit pincode of the area", min_length=6, max_length=6)
-    lotArea: float = Field(..., description="Total lot area in square feet", gt=0)
-    livingArea: float = Field(..., description="Living area in square feet", gt=0)
-    builtYear: int = Field(..., description="Year the house was built", ge=1800, le=2024)
-    floors: float = Field(..., description="Number of floors", gt=0)
-    bedrooms: float = Field(..., description="Number of bedrooms", gt=0)
-    bathrooms: float = Field(..., description="Number of bathrooms", gt=0)
-    condition: int = Field(..., description="Condition rating (1-10)", ge=1, le=10)
+    # Constraints come from validation.FIELD_SPECS, which the service and
+    # the batch endpoint check with the same rules
+    pincode: str = spec_field('pincode')
+    lotArea: float = spec_field('lotArea')
+    livingArea: float = spec_field('livingArea')
+    builtYear: int = spec_field('builtYear')
+    floors: float = spec_field('floors')
+    bedrooms: float = spec_field('bedrooms')
+    bathrooms: float = spec_field('bathrooms')
+    condition: int = spec_field('condition')
     
     @validator('pincode')
     def validate_pincode(cls, v):
-        if not v.isdigit():
-            raise ValueError("pincode must contain only digits")
+        if len(v) != PINCODE_LENGTH or not v.isdigit():
+            raise ValueError(f"pincode must be a {PINCODE_LENGTH}-digit number")
         return v
     
-    @validator('bedrooms', 'bathrooms', 'floors')
+    @validator(*[name for name, spec in FIELD_SPECS.items() if spec.half_step])
     def validate_decimal_values(cls, v, field):
-        decimal_part = v % 1
-        if decimal_part != 0 and decimal_part != 0.5:
+        if not is_half_step(v):
             raise ValueError(f"{field.name} must be a whole number or end in .5")
         return v
     
@@ -94,7 +191,13 @@ async def predict_price(request: HousePredictionRequest):
     Predict house price based on input features
     """
     try:
-        prediction = prediction_service.predict(request.dict())
+        # The request model already applied the validation schema
+        if batcher is not None:
+            prediction = await batcher.predict(request.dict(), validated=True)
+        elif executor is not None:
+            prediction = await executor.predict(request.dict(), validated=True)
+        else:
+            prediction = prediction_service.predict(request.dict(), validated=True)
         if prediction.get('status') == 'error':
             raise HTTPException(status_code=500, detail=prediction.get('error'))
         if prediction.get('status') == 'validation_error':
@@ -104,12 +207,132 @@ async def predict_price(request: HousePredictionRequest):
         logger.error(f"Error processing request: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+class HousePredictionBatchRequest(BaseModel):
+    # Items are validated in the endpoint, all at once, so that a bad house
+    # (even one that is not an object) yields a per-item error instead of
+    # rejecting the whole batch
+    houses: List[Any] = Field(
+        ...,
+        description="Houses to price, each with the same fields as /predict",
+        min_items=1,
+        max_items=MAX_BATCH_HOUSES
+    )
+
+@app.post("/predict/batch", response_model=Dict[str, Any])
+async def predict_price_batch(request: HousePredictionBatchRequest):
+    """
+    Predict prices for a list of houses in one vectorized pass
+
+    Results are returned in request order. Houses that fail validation get
+    a validation_error result without failing the rest of the batch. Unlike
+    /predict, values are not coerced: numeric fields must be JSON numbers
+    and pincode a string.
+    """
+    try:
+        results = [None] * len(request.houses)
+        valid_idx = []
+        valid_houses = []
+        for i, error in enumerate(validate_records(request.houses)):
+            if error is None:
+                valid_houses.append(request.houses[i])
+                valid_idx.append(i)
+            else:
+                results[i] = {'error': error, 'status': 'validation_error'}
+
+        if executor is not None:
+            predictions = await executor.predict_batch(valid_houses, validated=True)
+        else:
+            predictions = prediction_service.predict_batch(valid_houses, validated=True)
+        for i, prediction in zip(valid_idx, predictions):
+            results[i] = prediction
+
+        succeeded = sum(1 for r in results if r['status'] == 'success')
+        return {
+            'results': results,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded
+        }
+    except Exception as e:
+        logger.error(f"Error processing batch request: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+class ModelReloadRequest(BaseModel):
+    model_path: Optional[str] = Field(
+        None, description="Model file to load; defaults to the model being served or the newest one"
+    )
+
+async def reload_in_background(model_path: Optional[str]) -> Dict[str, Any]:
+    # Loading and warm-up run on a worker thread; the current model keeps
+    # serving until the swap
+    loop = asyncio.get_running_loop()
+    reloaded = await loop.run_in_executor(None, prediction_service.reload_model, model_path)
+    if not reloaded:
+        raise HTTPException(
+            status_code=500,
+            detail="Model reload failed; the previous model is still being served"
+        )
+    return {
+        "status": "reloaded",
+        "model_path": prediction_service.model_path,
+        "model_version": prediction_service.model_version
+    }
+
+@app.post("/admin/reload", dependencies=[Depends(require_admin)])
+async def reload_model(request: Optional[ModelReloadRequest] = None):
+    """
+    Load a model in the background and atomically swap it in
+    """
+    return await reload_in_background(request.model_path if request else None)
+
+@app.post("/admin/rollback", dependencies=[Depends(require_admin)])
+async def rollback():
+    """
+    Restore the latest production backup and swap it in
+    """
+    from update_model import PRODUCTION_MODEL_PATH, rollback_model
+    
+    loop = asyncio.get_running_loop()
+    success, message = await loop.run_in_executor(None, rollback_model)
+    if not success:
+        raise HTTPException(status_code=500, detail=message)
+    result = await reload_in_background(PRODUCTION_MODEL_PATH)
+    result["message"] = message
+    return result
+
 @app.get("/health")
 async def health_check():
     """
     Health check endpoint
     """
-    return {"status": "healthy", "model_path": prediction_service.model_path}
+    return {
+        "status": "healthy",
+        "model_path": prediction_service.model_path,
+        "model_version": prediction_service.model_version
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Runtime metrics for tuning the serving configuration
+    """
+    return {
+        "batching": batcher.stats() if batcher is not None else {"enabled": False},
+        "executor": executor.stats() if executor is not None else {"enabled": False},
+        "startup": startup.report(),
+        "cache": (
+            executor.cache_stats() if executor is not None
+            else prediction_service.cache.stats() if prediction_service.cache is not None
+            else {"enabled": False}
+        )
+    }
 
 if __name__ == "__main__":
-    uvicorn.run("api:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the house price prediction API")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="Print how long each startup phase took and exit")
+    args = parser.parse_args()
+    if args.startup_report:
+        print(startup.format())
+    else:
+        uvicorn.run("api:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
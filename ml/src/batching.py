@@ -0,0 +1,175 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Dict, List, Union
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-house predictions into batched model calls
+
+    Requests that arrive within max_wait_ms of the first queued request (up
+    to max_batch_size of them) are scored with one call to the service's
+    predict_batch, and each result is handed back to the coroutine that
+    asked for it.
+    """
+
+    def __init__(self, service, max_batch_size: int = 64, max_wait_ms: float = 2.0,
+                 executor=None):
+        """
+        Initialize the batcher
+
+        Args:
+            service (HousePricePredictionService): Service used to score batches
+            max_batch_size (int): Largest number of requests scored together
+            max_wait_ms (float): Longest time the first request in a batch
+                waits for others to join it
+            executor (InferenceExecutor): Runs batches off the event loop,
+                several at a time; batches run inline when None
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative")
+
+        self.service = service
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = None
+        self._worker = None
+        self._scoring = set()
+
+        # Realized batch sizes, for tuning the throughput/latency trade-off
+        self.batch_sizes = Counter()
+        self.total_requests = 0
+        self.total_batches = 0
+
+    async def start(self):
+        """Start the background task that drains the request queue"""
+        if self._worker is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+        logger.info(
+            f"Micro-batching started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait_ms})"
+        )
+
+    async def stop(self):
+        """Stop the background task, let running batches finish and fail any requests still queued"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        if self._scoring:
+            await asyncio.gather(*self._scoring, return_exceptions=True)
+
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Prediction batcher stopped"))
+
+    async def predict(self, data: Dict, validated: bool = False) -> Dict[str, Union[float, str]]:
+        """
+        Queue one input and wait for its batched prediction
+
+        Args:
+            data (dict): Input features
+            validated (bool): Input was already checked against
+                validation.FIELD_SPECS
+
+        Returns:
+            dict: Same result format as HousePricePredictionService.predict
+        """
+        if self._worker is None:
+            raise RuntimeError("Prediction batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((data, validated, future))
+        return await future
+
+    async def _collect(self) -> List:
+        """Wait for one request, then gather more until the batch is full or the window closes"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_ms / 1000
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Requests whose caller went away are not worth scoring
+            batch = [entry for entry in batch if not entry[2].done()]
+            if not batch:
+                continue
+
+            self.batch_sizes[len(batch)] += 1
+            self.total_batches += 1
+            self.total_requests += len(batch)
+
+            if self.executor is None:
+                await self._score(batch)
+                continue
+
+            # Keep collecting the next batch while this one runs on the pool
+            task = asyncio.get_running_loop().create_task(self._score(batch))
+            self._scoring.add(task)
+            task.add_done_callback(self._scoring.discard)
+
+    async def _score(self, batch: List):
+        try:
+            items = [data for data, _, _ in batch]
+            # The service skips validation only if every input had it already
+            validated = all(validated for _, validated, _ in batch)
+            if self.executor is not None:
+                results = await self.executor.predict_batch(items, validated)
+            else:
+                results = self.service.predict_batch(items, validated)
+        except Exception as e:
+            logger.error(f"Batched prediction failed: {str(e)}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        """
+        Report the batching configuration and realized batch sizes
+
+        Returns:
+            dict: Request/batch counters, mean batch size and a histogram of
+                batch sizes
+        """
+        mean_batch_size = self.total_requests / self.total_batches if self.total_batches else 0.0
+        return {
+            'enabled': True,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'requests': self.total_requests,
+            'batches': self.total_batches,
+            'mean_batch_size': round(mean_batch_size, 2),
+            'batch_size_histogram': dict(sorted(self.batch_sizes.items()))
+        }
@@ -0,0 +1,110 @@
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split
+
+from model import HousePriceModel
+
+def synthetic_listings(n_rows, random_state=42):
+    """
+    Listings shaped like the training data, with a nonlinear price
+
+    Args:
+        n_rows (int): Number of listings
+
+    Returns:
+        tuple: (features as pd.DataFrame, price as np.array)
+    """
+    rng = np.random.default_rng(random_state)
+    bedrooms = rng.integers(1, 7, n_rows)
+    living_area = rng.gamma(6.0, 350.0, n_rows) + 300 * bedrooms
+    X = pd.DataFrame({
+        'bedrooms': bedrooms,
+        'bathrooms': np.round(rng.uniform(1, 4, n_rows) * 4) / 4,
+        'living_area': living_area,
+        'lot_area': living_area * rng.lognormal(0.8, 0.6, n_rows),
+        'floors': rng.integers(1, 4, n_rows),
+        'waterfront': (rng.random(n_rows) < 0.02).astype(int),
+        'views': rng.integers(0, 5, n_rows),
+        'condition': rng.integers(1, 6, n_rows),
+        'grade': rng.integers(4, 13, n_rows),
+        'built_year': rng.integers(1900, 2016, n_rows),
+        'latitude': rng.uniform(52.9, 53.2, n_rows),
+        'longitude': rng.uniform(-114.5, -113.8, n_rows)
+    })
+    centre = np.hypot(X['latitude'] - 53.05, (X['longitude'] + 114.1) * 0.6)
+    price = (
+        150 * X['living_area'] ** 0.9
+        * (1 + 0.08 * (X['grade'] - 7)) ** 2
+        * (1 + 0.6 * X['waterfront'] + 0.05 * X['views'])
+        * np.exp(-3 * centre)
+        * np.where(X['built_year'] < 1950, 1.1, 1.0 - (2016 - X['built_year']) / 400)
+        * rng.lognormal(0, 0.15, n_rows)
+    )
+    return X, price.to_numpy()
+
+def median_latency_ms(model, X, repeats):
+    model.predict(X)  # warm up
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+def benchmark(n_rows, backends, single_repeats=200, batch_repeats=5):
+    """
+    Fit each backend on 80% of n_rows synthetic listings and time it
+
+    Returns:
+        list: One dict per backend with fit seconds, iterations, single-row
+            and 10,000-row predict latency (ms) and holdout RMSE
+    """
+    X, y = synthetic_listings(n_rows)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    batch = X_test.iloc[:10000]
+
+    results = []
+    for backend in backends:
+        model = HousePriceModel(backend=backend)
+        start = time.perf_counter()
+        model.train(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        estimator = model.model
+        results.append({
+            'rows': n_rows,
+            'backend': backend,
+            'fit_s': fit_seconds,
+            'iterations': getattr(estimator, 'n_iter_', None) or estimator.n_estimators_,
+            'single_row_ms': median_latency_ms(model, X_test.iloc[:1], single_repeats),
+            'batch_ms': median_latency_ms(model, batch, batch_repeats),
+            'rmse': np.sqrt(mean_squared_error(y_test, model.predict(X_test)))
+        })
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare fit time, predict latency and RMSE of the HousePriceModel backends"
+    )
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help="Synthetic dataset sizes")
+    parser.add_argument('--backends', nargs='+', default=['gbr', 'hist'], choices=['gbr', 'hist'])
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'rows':>9} {'backend':>8} {'fit s':>9} {'iters':>6} {'1 row ms':>9} "
+          f"{'10k rows ms':>12} {'RMSE':>11}")
+    for n_rows in args.rows:
+        results = benchmark(n_rows, args.backends)
+        for r in results:
+            print(f"{r['rows']:>9} {r['backend']:>8} {r['fit_s']:>9.2f} {r['iterations']:>6} "
+                  f"{r['single_row_ms']:>9.3f} {r['batch_ms']:>12.2f} {r['rmse']:>11.0f}")
+        fit_seconds = {r['backend']: r['fit_s'] for r in results}
+        if 'gbr' in fit_seconds and 'hist' in fit_seconds:
+            print(f"{'':>9} hist fit speedup over gbr {fit_seconds['gbr'] / fit_seconds['hist']:.1f}x")
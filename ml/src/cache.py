@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+class PredictionCache:
+    """
+    Bounded, thread-safe LRU cache of prediction results
+
+    Entries expire after ttl_seconds and the whole cache is dropped when the
+    model version changes, so a reloaded model never serves stale prices.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 600.0):
+        """
+        Initialize the cache
+
+        Args:
+            max_size (int): Maximum number of cached results
+            ttl_seconds (float): Lifetime of a cached result
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(data: Dict) -> Hashable:
+        """
+        Build a canonical cache key for an input dictionary
+
+        Keys are sorted and values normalized, so {'floors': 2} and
+        {'floors': 2.0} share an entry regardless of field order.
+
+        Args:
+            data (dict): Validated input features
+
+        Returns:
+            tuple: Hashable canonical form of the input
+        """
+        items = []
+        for field in sorted(data):
+            value = data[field]
+            if isinstance(value, (bool, int, float)):
+                value = float(value)
+            elif isinstance(value, str):
+                value = value.strip()
+            items.append((field, value))
+        return tuple(items)
+
+    def _sync_version(self, model_version: int) -> bool:
+        """Drop all entries when a newer model is seen; False for an older one"""
+        if self._model_version is None or model_version > self._model_version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._model_version = model_version
+        return model_version == self._model_version
+
+    def get(self, key: Hashable, model_version: int) -> Optional[Dict]:
+        """
+        Look up a cached result
+
+        Args:
+            key: Key from make_key
+            model_version (int): Version of the model that would serve the request
+
+        Returns:
+            dict or None: Copy of the cached result, or None on a miss
+        """
+        with self._lock:
+            if not self._sync_version(model_version):
+                self.misses += 1
+                return None
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(value)
+
+    def put(self, key: Hashable, value: Dict, model_version: int):
+        """
+        Store a result computed by the given model version
+
+        Results from a model older than the newest one seen are discarded.
+
+        Args:
+            key: Key from make_key
+            value (dict): Prediction result
+            model_version (int): Version of the model that produced it
+        """
+        with self._lock:
+            if not self._sync_version(model_version):
+                return
+
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached result"""
+        with self._lock:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+
+    def stats(self) -> Dict:
+        """
+        Report cache size and hit/miss/eviction counters
+
+        Returns:
+            dict: Cache configuration and counters
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': True,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'model_version': self._model_version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Union
+
+logger = logging.getLogger(__name__)
+
+# Service owned by a process-pool worker, loaded once by _init_worker
+_worker_service = None
+
+def _init_worker(model_path: str, compile_model: bool, cache_size: int, cache_ttl: float):
+    global _worker_service
+    from service import HousePricePredictionService
+    _worker_service = HousePricePredictionService(
+        model_path, compile_model=compile_model, cache_size=cache_size, cache_ttl=cache_ttl
+    )
+
+def _worker_call(method: str, data, validated: bool):
+    started_at = time.time()
+    result = getattr(_worker_service, method)(data, validated)
+    # Each worker has its own prediction cache; send its counters back so
+    # the main process can report them
+    cache = _worker_service.cache
+    return started_at, result, os.getpid(), cache.stats() if cache is not None else None
+
+def _worker_ready():
+    return os.getpid()
+
+class InferenceExecutor:
+    """
+    Run CPU-bound predictions off the asyncio event loop
+
+    'thread' shares the service with a thread pool (sklearn and NumPy
+    release the GIL for most of the work). 'process' gives each worker
+    process its own copy of the service, loaded once at startup, and
+    restarts the pool when the served model changes. Each worker then holds
+    its own model and prediction cache, next to the main process's service
+    which still loads the model for reloads and validation.
+
+    Queue depth and queue wait time are tracked to show saturation.
+    """
+
+    def __init__(self, service, kind: str = 'thread', max_workers: int = None):
+        """
+        Initialize the executor
+
+        Args:
+            service (HousePricePredictionService): Service to run predictions on
+            kind (str): 'thread' or 'process'
+            max_workers (int): Pool size, defaults to the number of CPUs
+        """
+        if kind not in ('thread', 'process'):
+            raise ValueError("kind must be 'thread' or 'process'")
+
+        self.service = service
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+        self._pool_model_version = None
+        self._pool_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.max_queue_depth = 0
+        self._wait_ms = deque(maxlen=1000)
+        # Latest cache counters of each process worker, by pid
+        self._worker_cache_stats = {}
+
+    def _new_pool(self):
+        if self.kind == 'thread':
+            return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='inference')
+
+        cache = self.service.cache
+        pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(
+                self.service.model_path,
+                self.service.compile_model,
+                cache.max_size if cache is not None else 0,
+                cache.ttl_seconds if cache is not None else 600.0
+            )
+        )
+        # Workers start lazily; make each one load its model now
+        for future in [pool.submit(_worker_ready) for _ in range(self.max_workers)]:
+            future.result()
+        return pool
+
+    def _current_pool(self):
+        """Pool for the model being served; process pools are rebuilt after a reload"""
+        with self._pool_lock:
+            model_version = self.service.model_version
+            if self._pool is None or (self.kind == 'process' and self._pool_model_version != model_version):
+                old_pool = self._pool
+                self._pool = self._new_pool()
+                self._pool_model_version = model_version
+                with self._stats_lock:
+                    self._worker_cache_stats.clear()
+                if old_pool is not None:
+                    # Let tasks already running finish on the old model
+                    old_pool.shutdown(wait=False)
+                    logger.info(f"Restarted inference processes for model version {model_version}")
+            return self._pool
+
+    def start(self):
+        """Create the pool (and, for processes, load the model in every worker)"""
+        self._current_pool()
+        logger.info(f"Inference executor started ({self.kind}, {self.max_workers} workers)")
+
+    def shutdown(self):
+        """Shut the pool down, waiting for running predictions"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    def _record_start(self, submitted_at: float, started_at: float):
+        with self._stats_lock:
+            self._wait_ms.append(max(0.0, started_at - submitted_at) * 1000)
+
+    def _timed_call(self, submitted_at: float, method: str, data, validated: bool):
+        self._record_start(submitted_at, time.time())
+        return getattr(self.service, method)(data, validated)
+
+    async def _run(self, method: str, data, validated: bool):
+        loop = asyncio.get_running_loop()
+        with self._stats_lock:
+            self.submitted += 1
+            queue_depth = max(0, self.submitted - self.completed - self.max_workers)
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+        submitted_at = time.time()
+        try:
+            if self.kind == 'thread':
+                pool = self._current_pool()
+                return await loop.run_in_executor(
+                    pool, self._timed_call, submitted_at, method, data, validated
+                )
+
+            pool = self._pool
+            if pool is None or self._pool_model_version != self.service.model_version:
+                # Rebuilding a process pool blocks, so do it off the event loop
+                pool = await loop.run_in_executor(None, self._current_pool)
+            started_at, result, pid, cache_stats = await loop.run_in_executor(
+                pool, _worker_call, method, data, validated
+            )
+            self._record_start(submitted_at, started_at)
+            if cache_stats is not None:
+                with self._stats_lock:
+                    self._worker_cache_stats[pid] = cache_stats
+            return result
+        finally:
+            with self._stats_lock:
+                self.completed += 1
+
+    async def predict(self, data: Dict, validated: bool = False) -> Dict[str, Union[float, str]]:
+        """Run HousePricePredictionService.predict on the pool"""
+        return await self._run('predict', data, validated)
+
+    async def predict_batch(self, data: List[Dict], validated: bool = False) -> List[Dict[str, Union[float, str]]]:
+        """Run HousePricePredictionService.predict_batch on the pool"""
+        return await self._run('predict_batch', data, validated)
+
+    def stats(self) -> Dict:
+        """
+        Report pool saturation
+
+        Returns:
+            dict: In-flight and queued task counts, and queue wait times in ms
+                over the last 1000 tasks
+        """
+        with self._stats_lock:
+            waits = sorted(self._wait_ms)
+            in_flight = self.submitted - self.completed
+            return {
+                'enabled': True,
+                'kind': self.kind,
+                'max_workers': self.max_workers,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'in_flight': in_flight,
+                'queue_depth': max(0, in_flight - self.max_workers),
+                'max_queue_depth': self.max_queue_depth,
+                'wait_ms_mean': round(sum(waits) / len(waits), 3) if waits else 0.0,
+                'wait_ms_p95': round(waits[math.ceil(0.95 * len(waits)) - 1], 3) if waits else 0.0,
+                'wait_ms_max': round(waits[-1], 3) if waits else 0.0
+            }
+
+    def cache_stats(self) -> Dict:
+        """
+        Report the prediction cache that serves predictions
+
+        With threads that is the service's own cache. Process workers each
+        cache their own predictions, so a repeated input only hits on the
+        worker that saw it before; their counters are summed, as of each
+        worker's last task since the pool started.
+
+        Returns:
+            dict: Cache configuration and counters, see PredictionCache.stats
+        """
+        if self.kind == 'thread':
+            cache = self.service.cache
+            return cache.stats() if cache is not None else {'enabled': False}
+        if self.service.cache is None:
+            return {'enabled': False}
+
+        with self._stats_lock:
+            workers = list(self._worker_cache_stats.values())
+        totals = {
+            name: sum(worker[name] for worker in workers)
+            for name in ('size', 'hits', 'misses', 'evictions', 'expirations', 'invalidations')
+        }
+        lookups = totals['hits'] + totals['misses']
+        return {
+            'enabled': True,
+            'scope': 'per_worker',
+            'workers_reporting': len(workers),
+            'max_size_per_worker': self.service.cache.max_size,
+            'ttl_seconds': self.service.cache.ttl_seconds,
+            **totals,
+            'hit_rate': round(totals['hits'] / lookups, 4) if lookups else 0.0
+        }
@@ -1,34 +1,82 @@
-from sklearn.ensemble import GradientBoostingRegressor
 import numpy as np
 import joblib
 import logging
+from compiled_model import compile_model
+
+# Default hyperparameters per backend:
+# - 'gbr': GradientBoostingRegressor, exact splits, single-threaded
+# - 'hist': HistGradientBoostingRegressor, features binned into at most 255
+#   buckets, multi-threaded (OpenMP, all cores) and stopping once the score
+#   on a held-out 10% of the training rows stops improving
+DEFAULT_PARAMS = {
+    'gbr': {
+        'n_estimators': 100,
+        'learning_rate': 0.1,
+        'max_depth': 5,
+        'min_samples_split': 5,
+        'min_samples_leaf': 2,
+        'random_state': 42
+    },
+    'hist': {
+        'max_iter': 500,
+        'learning_rate': 0.1,
+        'max_leaf_nodes': 31,
+        'min_samples_leaf': 20,
+        'max_bins': 255,
+        'early_stopping': True,
+        'validation_fraction': 0.1,
+        'n_iter_no_change': 20,
+        'random_state': 42
+    }
+}
+
+# Rows sampled to estimate permutation importances for the 'hist' backend
+IMPORTANCE_SAMPLE_SIZE = 5000
+
+def _backend_of(estimator):
+    """Backend name of a fitted estimator, for artifacts saved without one"""
+    return 'hist' if type(estimator).__name__ == 'HistGradientBoostingRegressor' else 'gbr'
 
 class HousePriceModel:
     """
-    House price prediction model using Gradient Boosting Regressor
+    House price prediction model using gradient boosting
+    
+    Backed by either GradientBoostingRegressor ('gbr', the default) or
+    HistGradientBoostingRegressor ('hist'), which trains much faster on
+    large datasets. Both expose the same interface.
     """
     
-    def __init__(self, params=None):
+    def __init__(self, params=None, backend='gbr'):
         """
         Initialize the model with given parameters
         
         Args:
-            params (dict): Model hyperparameters
+            params (dict): Model hyperparameters, defaults to
+                DEFAULT_PARAMS[backend]
+            backend (str): 'gbr' or 'hist'
         """
         self.logger = logging.getLogger(__name__)
         
+        if backend not in DEFAULT_PARAMS:
+            raise ValueError(f"Unknown model backend {backend!r}, expected one of {sorted(DEFAULT_PARAMS)}")
         if params is None:
-            params = {
-                'n_estimators': 100,
-                'learning_rate': 0.1,
-                'max_depth': 5,
-                'min_samples_split': 5,
-                'min_samples_leaf': 2,
-                'random_state': 42
-            }
-        
-        self.model = GradientBoostingRegressor(**params)
-        self.logger.info("Model initialized with parameters: %s", params)
+            params = DEFAULT_PARAMS[backend]
+        
+        # Only needed to build a new model; unpickling a fitted one imports
+        # what it needs
+        if backend == 'hist':
+            from sklearn.ensemble import HistGradientBoostingRegressor
+            self.model = HistGradientBoostingRegressor(**params)
+        else:
+            from sklearn.ensemble import GradientBoostingRegressor
+            self.model = GradientBoostingRegressor(**params)
+        self.backend = backend
+        self.compiled = None
+        # Fitted preprocessing.FeaturePipeline, saved and loaded with the model
+        self.feature_pipeline = None
+        # Permutation importances for backends without feature_importances_
+        self.feature_importances = None
+        self.logger.info("Model initialized with backend %s and parameters: %s", backend, params)
     
     def train(self, X, y):
         """
@@ -41,11 +89,60 @@ class HousePriceModel:
         try:
             self.logger.info("Starting model training")
             self.model.fit(X, y)
+            self.compiled = None
+            if self.backend == 'hist':
+                self.feature_importances = self._permutation_importance(X, y)
+                if self.model.do_early_stopping_:
+                    self.logger.info(
+                        "Early stopping after %d of %d iterations",
+                        self.model.n_iter_, self.model.max_iter
+                    )
             self.logger.info("Model training completed")
         except Exception as e:
             self.logger.error("Error during model training: %s", str(e))
             raise
     
+    def continue_training(self, X, y, n_estimators=50):
+        """
+        Add boosting iterations fitted on new data, keeping the existing ones
+        
+        The new trees correct the current model's residuals on X, so a few
+        thousand new rows update the model without retraining from scratch.
+        The 'hist' backend re-bins the features on X: the existing trees
+        keep their split thresholds as raw feature values, but the new trees
+        can only split on bin edges computed from the new rows, which are
+        coarser when X is small. It may also stop before adding all
+        n_estimators if its validation score stops improving.
+        
+        Args:
+            X (np.array): Features, encoded with the model's feature pipeline
+            y (np.array): Target values
+            n_estimators (int): Maximum number of boosting iterations to add
+        """
+        try:
+            if self.backend == 'hist':
+                before = self.model.n_iter_
+                self.model.set_params(warm_start=True, max_iter=before + n_estimators)
+            else:
+                before = self.model.n_estimators_
+                self.model.set_params(warm_start=True, n_estimators=before + n_estimators)
+            self.logger.info("Continuing training from %d iterations", before)
+            try:
+                self.model.fit(X, y)
+            finally:
+                # A later train() starts from scratch again
+                self.model.set_params(warm_start=False)
+            self.compiled = None
+            if self.backend == 'hist':
+                self.feature_importances = self._permutation_importance(X, y)
+                after = self.model.n_iter_
+            else:
+                after = self.model.n_estimators_
+            self.logger.info("Continued training completed, %d iterations added", after - before)
+        except Exception as e:
+            self.logger.error("Error during continued training: %s", str(e))
+            raise
+    
     def predict(self, X):
         """
         Make predictions on new data
@@ -57,35 +154,90 @@ class HousePriceModel:
             np.array: Predicted values
         """
         try:
-            predictions = self.model.predict(X)
+            predictor = self.compiled if self.compiled is not None else self.model
+            predictions = predictor.predict(X)
             return predictions
         except Exception as e:
             self.logger.error("Error during prediction: %s", str(e))
             raise
     
+    def compile(self):
+        """
+        Compile the fitted model into packed arrays for low-latency prediction
+        
+        predict() uses the compiled form afterwards. Its output is
+        numerically identical to the underlying estimator's.
+        
+        Returns:
+            bool: True if compiled, False if the model is not a supported
+                tree ensemble
+        """
+        try:
+            self.compiled = compile_model(self.model)
+            return True
+        except TypeError as e:
+            self.logger.warning("Model not compiled: %s", str(e))
+            return False
+    
+    def _permutation_importance(self, X, y):
+        """
+        Mean drop in R2 when each feature is shuffled, scaled to sum to 1
+        
+        Estimated on a sample of the training rows, since
+        HistGradientBoostingRegressor has no impurity-based importances.
+        """
+        from sklearn.inspection import permutation_importance
+        
+        n_rows = len(X)
+        if n_rows > IMPORTANCE_SAMPLE_SIZE:
+            rows = np.random.default_rng(42).choice(n_rows, IMPORTANCE_SAMPLE_SIZE, replace=False)
+            X = X.iloc[rows] if hasattr(X, 'iloc') else np.asarray(X)[rows]
+            y = y.iloc[rows] if hasattr(y, 'iloc') else np.asarray(y)[rows]
+        result = permutation_importance(self.model, X, y, n_repeats=3, random_state=42)
+        importance = np.clip(result.importances_mean, 0, None)
+        total = importance.sum()
+        return importance / total if total > 0 else importance
+    
     def get_feature_importance(self):
         """
         Get feature importance scores
         
+        Impurity-based for the 'gbr' backend; permutation importances
+        computed at training time for the 'hist' backend.
+        
         Returns:
             dict: Feature names and their importance scores
         """
         try:
+            if self.backend == 'hist':
+                if self.feature_importances is None:
+                    raise ValueError("Feature importances are computed by train(); model has not been trained")
+                return self.feature_importances
             importance = self.model.feature_importances_
             return importance
         except Exception as e:
             self.logger.error("Error getting feature importance: %s", str(e))
             raise
     
-    def save_model(self, filepath):
+    def save_model(self, filepath, compress=3):
         """
         Save the trained model to disk
         
+        The estimator and its feature pipeline are saved together, so
+        serving always uses the encodings the model was trained with.
+        
         Args:
             filepath (str): Path to save the model
+            compress: joblib compression, e.g. 3 (zlib level 3, the
+                default), ('lz4', 3) or 0 for none
         """
         try:
-            joblib.dump(self.model, filepath)
+            joblib.dump({
+                'model': self.model,
+                'feature_pipeline': self.feature_pipeline,
+                'backend': self.backend,
+                'feature_importances': self.feature_importances
+            }, filepath, compress=compress)
             self.logger.info("Model saved successfully to %s", filepath)
         except Exception as e:
             self.logger.error("Error saving model: %s", str(e))
@@ -96,6 +248,10 @@ class HousePriceModel:
         """
         Load a trained model from disk
         
+        Accepts both the current {'model', 'feature_pipeline', 'backend',
+        'feature_importances'} artifact and older files holding only the
+        estimator (feature_pipeline is None).
+        
         Args:
             filepath (str): Path to the saved model
             
@@ -103,8 +259,16 @@ class HousePriceModel:
             HousePriceModel: Loaded model instance
         """
         try:
-            model = HousePriceModel()
-            model.model = joblib.load(filepath)
+            artifact = joblib.load(filepath)
+            if isinstance(artifact, dict) and 'model' in artifact:
+                estimator = artifact['model']
+                model = HousePriceModel(backend=artifact.get('backend') or _backend_of(estimator))
+                model.model = estimator
+                model.feature_pipeline = artifact.get('feature_pipeline')
+                model.feature_importances = artifact.get('feature_importances')
+            else:
+                model = HousePriceModel(backend=_backend_of(artifact))
+                model.model = artifact
             return model
         except Exception as e:
             logging.error("Error loading model: %s", str(e))
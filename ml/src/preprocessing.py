@@ -1,14 +1,121 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import LabelEncoder
 import logging
 
-def preprocess_data(df):
+# API request field names -> training data column names
+API_COLUMN_NAMES = {
+    'lotArea': 'lot_area',
+    'livingArea': 'living_area',
+    'builtYear': 'built_year'
+}
+
+# condition -> condition_category, right-inclusive bins as in pd.cut
+CONDITION_BINS = np.array([0, 3, 6, 8, 10])
+CONDITION_LABELS = ['Poor', 'Fair', 'Good', 'Excellent']
+
+TARGET_COLUMN = 'price'
+
+class FeaturePipeline:
+    """
+    Feature engineering fitted once on the training data
+    
+    fit() freezes everything that depends on the data: the reference year
+    for house_age, the code of every category seen in training and the
+    feature column order. transform() then only applies these, so serving
+    one row gives exactly the encodings the model was trained with, without
+    refitting anything.
+    
+    Category codes match LabelEncoder (position in the sorted list of
+    training values); values not seen in training get -1.
+    condition_category is encoded as the index of its label in
+    CONDITION_LABELS, -1 outside the bins.
+    """
+    
+    def __init__(self):
+        self.reference_year = None
+        self.categories = {}
+        self.feature_columns = None
+    
+    def _derived_features(self, columns):
+        """house_age, living_lot_ratio and condition_category as arrays"""
+        # Same bins as pd.cut(..., bins=CONDITION_BINS), as integer codes
+        condition = np.asarray(columns['condition'], dtype=float)
+        codes = np.searchsorted(CONDITION_BINS, condition, side='left') - 1
+        codes[(codes < 0) | (codes >= len(CONDITION_LABELS))] = -1
+        return {
+            'house_age': self.reference_year - np.asarray(columns['built_year'], dtype=float),
+            'living_lot_ratio': (
+                np.asarray(columns['living_area'], dtype=float)
+                / np.asarray(columns['lot_area'], dtype=float)
+            ),
+            'condition_category': codes
+        }
+    
+    def fit(self, df):
+        """
+        Learn the reference year, category codes and column order
+        
+        Args:
+            df (pd.DataFrame): Training data, target column optional
+            
+        Returns:
+            FeaturePipeline: self
+        """
+        self.reference_year = pd.Timestamp.now().year
+        df = df.rename(columns=API_COLUMN_NAMES)
+        df = df.assign(**self._derived_features(df))
+        
+        self.feature_columns = [col for col in df.columns if col != TARGET_COLUMN]
+        categorical_cols = df[self.feature_columns].select_dtypes(include=['object']).columns
+        # Lookup tables from value to code; Index.get_indexer hashes them once
+        self.categories = {
+            col: pd.Index(np.sort(df[col].astype(str).unique()))
+            for col in categorical_cols
+        }
+        return self
+    
+    def transform(self, df):
+        """
+        Build model features with the fitted encodings
+        
+        Args:
+            df (pd.DataFrame): Raw rows, with training column names or API
+                field names
+            
+        Returns:
+            pd.DataFrame: Features in training column order
+        """
+        if self.feature_columns is None:
+            raise RuntimeError("FeaturePipeline must be fitted before transform")
+        
+        # Plain arrays by training column name: much cheaper than pandas
+        # indexing for the one-row frames built per request
+        source = {API_COLUMN_NAMES.get(col, col): df[col].to_numpy() for col in df.columns}
+        columns = self._derived_features(source)
+        for col in self.feature_columns:
+            if col in columns:
+                continue
+            if col in self.categories:
+                columns[col] = self.categories[col].get_indexer(source[col].astype(str))
+            else:
+                # Requests may carry numbers as strings (e.g. pincode)
+                columns[col] = source[col].astype(float)
+        return pd.DataFrame({col: columns[col] for col in self.feature_columns}, index=df.index)
+    
+    def fit_transform(self, df):
+        """Fit on df and return its features"""
+        return self.fit(df).transform(df)
+
+def preprocess_data(df, pipeline=None, fit=True):
     """
     Preprocess the input data for model training
     
     Args:
         df (pd.DataFrame): Raw input data
+        pipeline (FeaturePipeline): Fitted in place on df, so it can be
+            saved with the model; a new one is used when None
+        fit (bool): False to only apply an already fitted pipeline, e.g.
+            when continuing to train a saved model on new data
         
     Returns:
         tuple: (X, y) preprocessed features and target
@@ -24,14 +131,10 @@ def preprocess_data(df):
         df = handle_missing_values(df)
         
         # Feature engineering
-        df = create_features(df)
-        
-        # Prepare features and target
-        target_col = 'price'
-        feature_cols = [col for col in df.columns if col != target_col]
-        
-        X = df[feature_cols]
-        y = df[target_col]
+        if pipeline is None:
+            pipeline = FeaturePipeline()
+        X = pipeline.fit_transform(df) if fit else pipeline.transform(df)
+        y = df[TARGET_COLUMN]
         
         logger.info(f"Preprocessing complete. Features shape: {X.shape}")
         return X, y
@@ -56,7 +159,8 @@ def handle_missing_values(df):
     
     # Fill categorical columns with mode
     categorical_cols = df.select_dtypes(include=['object']).columns
-    df[categorical_cols] = df[categorical_cols].fillna(df[categorical_cols].mode().iloc[0])
+    if len(categorical_cols) > 0:
+        df[categorical_cols] = df[categorical_cols].fillna(df[categorical_cols].mode().iloc[0])
     
     return df
 
@@ -64,6 +168,10 @@ def create_features(df):
     """
     Create new features and transform existing ones
     
+    Refits the categorical encoders on every call, so the codes depend on
+    the rows passed in. Only used for models saved without a
+    FeaturePipeline.
+    
     Args:
         df (pd.DataFrame): Input dataframe
         
@@ -85,6 +193,7 @@ def create_features(df):
     )
     
     # Encode categorical variables
+    from sklearn.preprocessing import LabelEncoder
     categorical_cols = df.select_dtypes(include=['object']).columns
     for col in categorical_cols:
         le = LabelEncoder()
@@ -1,29 +1,77 @@
 import os
 import logging
+import threading
 from typing import Dict, Union, List
 import numpy as np
 import pandas as pd
 from model import HousePriceModel
-from preprocessing import create_features
+from model_registry import ModelRegistry
+from preprocessing import API_COLUMN_NAMES, create_features
+from cache import PredictionCache
+from validation import validate_record, validate_records
 
 logger = logging.getLogger(__name__)
 
+# Input used to exercise a freshly loaded model before it serves traffic
+WARMUP_INPUT = {
+    'pincode': '400001',
+    'lotArea': 5000.0,
+    'livingArea': 2000.0,
+    'builtYear': 2000,
+    'floors': 2.0,
+    'bedrooms': 3.0,
+    'bathrooms': 2.5,
+    'condition': 8
+}
+
+def file_signature(path: str) -> tuple:
+    """Identity of a file's current contents, changed by any replace or rewrite"""
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
 class HousePricePredictionService:
-    def __init__(self, model_path: str = None):
+    def __init__(self, model_path: str = None, compile_model: bool = False,
+                 cache_size: int = 0, cache_ttl: float = 600.0):
         """
         Initialize the prediction service
         
         Args:
             model_path (str): Path to the trained model file
+            compile_model (bool): Compile tree ensembles into packed arrays
+                for faster prediction
+            cache_size (int): Maximum number of cached predictions (0 disables
+                the cache)
+            cache_ttl (float): Lifetime of a cached prediction in seconds
         """
         self.model = None
+        self.model_version = 0
+        self.compile_model = compile_model
+        self.cache = PredictionCache(cache_size, cache_ttl) if cache_size > 0 else None
+        # Without an explicit path, follow whichever model is newest
+        self.follow_latest = model_path is None
         self.model_path = model_path or self._get_latest_model()
+        self._model_signature = None
+        self._rejected_signature = None
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
         self.load_model()
         
     def _get_latest_model(self) -> str:
-        """Get the most recently trained model from the models directory"""
+        """
+        Get the model to serve from the models directory
+        
+        The registry's production version, else its most recently
+        registered one. Directories without a registry fall back to the
+        newest .joblib file.
+        """
         try:
             models_dir = "models"
+            registry = ModelRegistry(models_dir)
+            entry = registry.production() or registry.latest()
+            if entry is not None:
+                return registry.path_of(entry)
+            
             model_files = [f for f in os.listdir(models_dir) if f.endswith('.joblib')]
             if not model_files:
                 raise FileNotFoundError("No model files found in models directory")
@@ -38,12 +86,128 @@ class HousePricePredictionService:
         """Load the trained model"""
         try:
             logger.info(f"Loading model from {self.model_path}")
-            self.model = HousePriceModel.load_model(self.model_path)
+            signature = file_signature(self.model_path)
+            self._swap_model(self._load_candidate(self.model_path), self.model_path, signature)
             logger.info("Model loaded successfully")
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
             raise
     
+    def _load_candidate(self, model_path: str) -> HousePriceModel:
+        """Load a model without touching the one being served"""
+        model = HousePriceModel.load_model(model_path)
+        if model.feature_pipeline is None:
+            logger.warning(
+                f"{model_path} has no saved feature pipeline; categorical "
+                "encodings are refitted per request and may not match training"
+            )
+        if self.compile_model:
+            model.compile()
+        return model
+    
+    def _swap_model(self, model: HousePriceModel, model_path: str, signature: tuple):
+        """Make a loaded model the one that serves new requests"""
+        # A single reference assignment: requests already running keep the
+        # model they picked up, new ones get this one
+        self.model = model
+        self.model_path = model_path
+        self._model_signature = signature
+        # A new version invalidates every cached prediction
+        self.model_version += 1
+    
+    def reload_model(self, model_path: str = None) -> bool:
+        """
+        Load and warm up a model in the calling thread, then swap it in
+        
+        The model being served keeps handling requests until the swap, and
+        stays in place if the new one fails to load or warm up.
+        
+        Args:
+            model_path (str): Model to load. Defaults to the newest model when
+                following the models directory, else the current path
+            
+        Returns:
+            bool: True if the new model is now being served
+        """
+        with self._reload_lock:
+            if model_path is None:
+                model_path = self._get_latest_model() if self.follow_latest else self.model_path
+            try:
+                signature = file_signature(model_path)
+            except OSError as e:
+                logger.error(f"Model reload failed, cannot read {model_path}: {str(e)}")
+                return False
+            
+            try:
+                logger.info(f"Reloading model from {model_path}")
+                candidate = self._load_candidate(model_path)
+                self.warm_up(candidate)
+            except Exception as e:
+                # Don't retry the same file until it changes again
+                self._rejected_signature = (model_path, signature)
+                logger.error(f"Model reload from {model_path} failed, still serving {self.model_path}: {str(e)}")
+                return False
+            
+            self._swap_model(candidate, model_path, signature)
+            self._rejected_signature = None
+            logger.info(f"Now serving model {model_path} (version {self.model_version})")
+            return True
+    
+    def warm_up(self, model: HousePriceModel = None):
+        """
+        Run one prediction so one-off costs (lazy imports, allocations) are
+        paid before serving traffic
+        
+        Args:
+            model (HousePriceModel): Model to warm up, defaults to the one
+                being served
+        """
+        model = model or self.model
+        model.predict(self._preprocess_input(WARMUP_INPUT, model))
+    
+    def _model_changed(self) -> Union[str, None]:
+        """Path of a new or rewritten model file, or None if nothing changed"""
+        model_path = self._get_latest_model() if self.follow_latest else self.model_path
+        signature = file_signature(model_path)
+        if (model_path, signature) == self._rejected_signature:
+            return None
+        if model_path != self.model_path or signature != self._model_signature:
+            return model_path
+        return None
+    
+    def _watch(self, interval: float):
+        while not self._stop_watching.wait(interval):
+            try:
+                model_path = self._model_changed()
+                if model_path is not None:
+                    self.reload_model(model_path)
+            except Exception as e:
+                logger.error(f"Error checking for model updates: {str(e)}")
+    
+    def start_watching(self, interval: float = 5.0):
+        """
+        Poll for a new or replaced model file and hot-reload it
+        
+        Args:
+            interval (float): Seconds between checks
+        """
+        if self._watcher is not None:
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="model-watcher", daemon=True
+        )
+        self._watcher.start()
+        logger.info(f"Watching for model updates every {interval}s")
+    
+    def stop_watching(self):
+        """Stop the model file watcher"""
+        if self._watcher is None:
+            return
+        self._stop_watching.set()
+        self._watcher.join()
+        self._watcher = None
+    
     def _validate_input(self, data: Dict) -> bool:
         """
         Validate input data format and required fields
@@ -54,102 +218,144 @@ class HousePricePredictionService:
         Returns:
             bool: True if valid, raises ValueError if invalid
         """
-        required_fields = {
-            'pincode': str,
-            'lotArea': (int, float),
-            'livingArea': (int, float),
-            'builtYear': int,
-            'floors': (int, float),
-            'bedrooms': (int, float),
-            'bathrooms': (int, float),
-            'condition': int
-        }
-        
-        for field, field_type in required_fields.items():
-            if field not in data:
-                raise ValueError(f"Missing required field: {field}")
-            if not isinstance(data[field], field_type):
-                raise ValueError(f"Invalid type for {field}. Expected {field_type}")
-        
-        # Additional validation rules
-        if not len(data['pincode']) == 6 or not data['pincode'].isdigit():
-            raise ValueError("pincode must be a 6-digit number")
-            
-        if not (1800 <= data['builtYear'] <= 2024):
-            raise ValueError("builtYear must be between 1800 and 2024")
-            
-        if not (1 <= data['condition'] <= 10):
-            raise ValueError("condition must be between 1 and 10")
-            
-        if data['lotArea'] <= 0 or data['livingArea'] <= 0:
-            raise ValueError("area values must be positive")
-            
-        if data['bedrooms'] <= 0 or data['bathrooms'] <= 0:
-            raise ValueError("bedrooms and bathrooms must be positive")
-            
-        # Validate that bedrooms and bathrooms are whole numbers or .5
-        for field in ['bedrooms', 'bathrooms']:
-            decimal_part = data[field] % 1
-            if decimal_part != 0 and decimal_part != 0.5:
-                raise ValueError(f"{field} must be a whole number or end in .5")
-            
-        # Validate floors can be whole numbers or .5
-        decimal_part = data['floors'] % 1
-        if decimal_part != 0 and decimal_part != 0.5:
-            raise ValueError("floors must be a whole number or end in .5")
-        
+        validate_record(data)
         return True
     
-    def _preprocess_input(self, data: Dict) -> pd.DataFrame:
+    def _preprocess_input(self, data: Union[Dict, List[Dict]],
+                          model: HousePriceModel = None) -> pd.DataFrame:
         """
         Preprocess input data for prediction
         
         Args:
-            data (dict): Input data dictionary
+            data (dict or list): Input data dictionary, or a list of them
+                to preprocess as one multi-row frame
+            model (HousePriceModel): Model whose feature pipeline to apply,
+                defaults to the one being served
             
         Returns:
             pd.DataFrame: Preprocessed features
         """
         try:
+            model = model or self.model
+            
             # Convert input to DataFrame
-            df = pd.DataFrame([data])
+            df = pd.DataFrame(data if isinstance(data, list) else [data])
             
-            # Apply feature engineering
-            df = create_features(df)
+            # Apply the feature engineering fitted at training time
+            if model.feature_pipeline is not None:
+                return model.feature_pipeline.transform(df)
             
-            return df
+            # Models saved without a pipeline
+            return create_features(df.rename(columns=API_COLUMN_NAMES))
         except Exception as e:
             logger.error(f"Error preprocessing input: {str(e)}")
             raise
     
-    def predict(self, data: Dict) -> Dict[str, Union[float, str]]:
+    def predict(self, data: Dict, validated: bool = False) -> Dict[str, Union[float, str]]:
         """
         Make price prediction for input data
         
         Args:
             data (dict): Input features
+            validated (bool): Input was already checked against
+                validation.FIELD_SPECS (e.g. by the API request model)
             
         Returns:
             dict: Prediction result with price and confidence
         """
         try:
             # Validate input
-            self._validate_input(data)
+            if not validated:
+                self._validate_input(data)
+            
+            # Serve repeated inputs from the cache
+            model_version = self.model_version
+            model = self.model
+            if self.cache is not None:
+                cache_key = self.cache.make_key(data)
+                cached = self.cache.get(cache_key, model_version)
+                if cached is not None:
+                    return cached
             
             # Preprocess input
-            features = self._preprocess_input(data)
+            features = self._preprocess_input(data, model)
             
             # Make prediction
-            prediction = self.model.predict(features)[0]
+            prediction = model.predict(features)[0]
             
-            return {
+            result = {
                 'predicted_price': round(float(prediction), 2),
                 'status': 'success'
             }
+            if self.cache is not None:
+                self.cache.put(cache_key, result, model_version)
+            return result
             
         except ValueError as ve:
             logger.warning(f"Validation error: {str(ve)}")
             return {'error': str(ve), 'status': 'validation_error'}
         except Exception as e:
             logger.error(f"Prediction error: {str(e)}")
-            return {'error': 'Internal prediction error', 'status': 'error'} 
\ No newline at end of file
+            return {'error': 'Internal prediction error', 'status': 'error'}
+    
+    def predict_batch(self, data: List[Dict], validated: bool = False) -> List[Dict[str, Union[float, str]]]:
+        """
+        Make price predictions for many inputs in one vectorized pass
+        
+        Inputs are validated together, column by column, then every valid
+        input is featurized and scored together with a single model call.
+        
+        Args:
+            data (list): Input feature dictionaries
+            validated (bool): Every input was already checked against
+                validation.FIELD_SPECS
+            
+        Returns:
+            list: One result per input, in input order. Invalid inputs get a
+                validation_error result and do not affect the others
+        """
+        results = [None] * len(data)
+        valid_idx = []
+        valid_rows = []
+        cache_keys = []
+        model_version = self.model_version
+        model = self.model
+        
+        errors = [None] * len(data) if validated else validate_records(data)
+        for i, (item, error) in enumerate(zip(data, errors)):
+            if error is not None:
+                results[i] = {'error': error, 'status': 'validation_error'}
+                continue
+            if self.cache is not None:
+                cache_key = self.cache.make_key(item)
+                cached = self.cache.get(cache_key, model_version)
+                if cached is not None:
+                    results[i] = cached
+                    continue
+                cache_keys.append(cache_key)
+            valid_idx.append(i)
+            valid_rows.append(item)
+        
+        if not valid_rows:
+            return results
+        
+        try:
+            features = self._preprocess_input(valid_rows, model)
+            predictions = model.predict(features)
+        except Exception as e:
+            logger.error(f"Batch prediction error: {str(e)}")
+            for i in valid_idx:
+                results[i] = {'error': 'Internal prediction error', 'status': 'error'}
+            return results
+        
+        for i, prediction in zip(valid_idx, predictions):
+            results[i] = {
+                'predicted_price': round(float(prediction), 2),
+                'status': 'success'
+            }
+        if self.cache is not None:
+            for i, cache_key in zip(valid_idx, cache_keys):
+                self.cache.put(cache_key, results[i], model_version)
+        
+        logger.debug(f"Batch prediction: {len(valid_rows)}/{len(data)} items scored")
+        return results
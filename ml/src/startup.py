@@ -0,0 +1,55 @@
+import time
+
+
+class StartupTimer:
+    """
+    Time the phases of process startup (imports, model load, warmup)
+
+    Each mark() closes a phase that began at the previous mark. Marks made
+    after finish(), e.g. during a later model reload, are ignored.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases = {}
+        self.total = None
+
+    def mark(self, phase):
+        """
+        End a phase
+
+        Args:
+            phase (str): Name of the phase that just completed; repeated
+                names accumulate
+        """
+        if self.total is not None:
+            return
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def finish(self):
+        """Close the report; the total runs from creation to now"""
+        if self.total is None:
+            self.total = time.perf_counter() - self.started
+
+    def report(self):
+        """
+        Phase durations
+
+        Returns:
+            dict: phases_ms (phase -> ms, in order) and total_ms
+        """
+        total = self.total if self.total is not None else time.perf_counter() - self.started
+        return {
+            'phases_ms': {phase: round(seconds * 1000, 1) for phase, seconds in self.phases.items()},
+            'total_ms': round(total * 1000, 1)
+        }
+
+    def format(self):
+        """Report as a printable table"""
+        report = self.report()
+        lines = [f"{phase:<12} {ms:>9.1f} ms" for phase, ms in report['phases_ms'].items()]
+        lines.append(f"{'total':<12} {report['total_ms']:>9.1f} ms")
+        return '\n'.join(lines)
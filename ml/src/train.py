@@ -6,8 +6,10 @@ import logging
 import os
 from datetime import datetime
 
-from preprocessing import preprocess_data
+from dataset_cache import load_dataset
+from preprocessing import FeaturePipeline, preprocess_data
 from model import HousePriceModel
+from model_registry import ModelRegistry
 
 # Configure logging
 logging.basicConfig(
@@ -20,6 +22,9 @@ def load_data(filepath):
     """
     Load data from CSV file
     
+    Parsed once, then memory-mapped from a columnar cache until the file
+    changes (see dataset_cache.load_dataset).
+    
     Args:
         filepath (str): Path to the CSV file
         
@@ -27,7 +32,7 @@ def load_data(filepath):
         pd.DataFrame: Loaded data
     """
     try:
-        data = pd.read_csv(filepath)
+        data = load_dataset(filepath)
         logger.info("Data loaded successfully from %s", filepath)
         return data
     except Exception as e:
@@ -75,7 +80,8 @@ def main():
         
         # Load and preprocess data
         data = load_data('data/house_data.csv')
-        X, y = preprocess_data(data)
+        feature_pipeline = FeaturePipeline()
+        X, y = preprocess_data(data, feature_pipeline)
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
@@ -83,9 +89,11 @@ def main():
         )
         logger.info("Data split into train and test sets")
         
-        # Initialize and train model
-        model = HousePriceModel()
+        # Initialize and train model; MODEL_BACKEND=hist trains the
+        # histogram-based backend, much faster on large datasets
+        model = HousePriceModel(backend=os.getenv('MODEL_BACKEND', 'gbr').lower())
         model.train(X_train, y_train)
+        model.feature_pipeline = feature_pipeline
         
         # Evaluate model
         metrics = evaluate_model(model, X_test, y_test)
@@ -94,6 +102,10 @@ def main():
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         model_path = f"models/house_price_model_{timestamp}.joblib"
         model.save_model(model_path)
+        ModelRegistry('models').register(
+            model_path, 'house_price_model', metrics=metrics,
+            feature_names=feature_pipeline.feature_columns, backend=model.backend
+        )
         
         logger.info("Training completed successfully")
         
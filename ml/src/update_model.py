@@ -4,19 +4,32 @@ from datetime import datetime
 import logging
 import shutil
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def update_model(new_model_path: str):
+MODELS_DIR = os.path.join(os.path.dirname(__file__), '..', 'models')
+PRODUCTION_MODEL_PATH = os.path.join(MODELS_DIR, 'house_price_model.joblib')
+BACKUP_PREFIX = 'house_price_model_backup_'
+
+def update_model(new_model_path: str, metrics: dict = None, source: str = None):
     """
     Update the production model with a new version
     
+    The production file is replaced atomically, so a running service that
+    watches it never sees a partially written model. It is then recorded
+    as the production version in the model registry.
+    
     Args:
         new_model_path: Path to the new model file
+        metrics: Evaluation metrics to record, defaulting to the registered
+            ones of new_model_path
+        source: Where the model came from, recorded in the registry;
+            defaults to new_model_path's registered version or file name
     """
+    from model_registry import ModelRegistry
+    
     try:
         # Create models directory if it doesn't exist
-        models_dir = os.path.join(os.path.dirname(__file__), '..', 'models')
+        models_dir = MODELS_DIR
         os.makedirs(models_dir, exist_ok=True)
         
         # Load new model to verify it's valid
@@ -26,21 +39,38 @@ def update_model(new_model_path: str):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         # Create backup of current model if exists
-        current_model_path = os.path.join(models_dir, 'house_price_model.joblib')
+        current_model_path = PRODUCTION_MODEL_PATH
         if os.path.exists(current_model_path):
             backup_path = os.path.join(
                 models_dir, 
-                f'house_price_model_backup_{timestamp}.joblib'
+                f'{BACKUP_PREFIX}{timestamp}.joblib'
             )
             shutil.copy2(current_model_path, backup_path)
             logger.info(f"Created backup at {backup_path}")
         
-        # Copy new model to production location
-        shutil.copy2(new_model_path, current_model_path)
+        # Copy new model next to the production location, then swap it in
+        staging_path = current_model_path + '.tmp'
+        shutil.copy2(new_model_path, staging_path)
+        os.replace(staging_path, current_model_path)
         logger.info(f"Updated production model with {new_model_path}")
         
+        registry = ModelRegistry(models_dir)
+        registered = next((entry for entry in registry.versions()
+                           if registry.path_of(entry) == os.path.abspath(new_model_path)), None)
+        if source is None:
+            source = registered['version'] if registered else os.path.basename(new_model_path)
+        feature_pipeline = new_model.get('feature_pipeline') if isinstance(new_model, dict) else None
+        registry.register(
+            current_model_path, 'house_price_model',
+            version=f'house_price_model_{timestamp}',
+            metrics=metrics if metrics is not None else (registered or {}).get('metrics'),
+            feature_names=getattr(feature_pipeline, 'feature_columns', None),
+            production=True,
+            source=source
+        )
+        
         # Clean up old backups (keep last 5)
-        backups = [f for f in os.listdir(models_dir) if f.startswith('house_price_model_backup_')]
+        backups = [f for f in os.listdir(models_dir) if f.startswith(BACKUP_PREFIX)]
         if len(backups) > 5:
             backups.sort()
             for old_backup in backups[:-5]:
@@ -53,13 +83,129 @@ def update_model(new_model_path: str):
         logger.error(f"Error updating model: {str(e)}")
         return False, str(e)
 
+def rollback_model():
+    """
+    Restore the most recent backup as the production model
+    
+    The rollback goes through update_model, so the model being replaced is
+    itself backed up and the swap is atomic.
+    """
+    try:
+        backups = sorted(f for f in os.listdir(MODELS_DIR) if f.startswith(BACKUP_PREFIX))
+        if not backups:
+            return False, "No backup available to roll back to"
+        
+        backup_path = os.path.join(MODELS_DIR, backups[-1])
+        logger.info(f"Rolling back to {backup_path}")
+        # Restore from a copy: backing up the current model may reuse the
+        # backup's timestamped name when both happen within the same second
+        restore_path = os.path.join(MODELS_DIR, 'rollback.joblib.tmp')
+        shutil.copy2(backup_path, restore_path)
+        try:
+            success, message = update_model(restore_path, source=backups[-1])
+        finally:
+            os.remove(restore_path)
+        if not success:
+            return False, message
+        return True, f"Rolled back to {backups[-1]}"
+        
+    except Exception as e:
+        logger.error(f"Error rolling back model: {str(e)}")
+        return False, str(e)
+
+def incremental_update(new_data_path: str, holdout_path: str = None,
+                       n_estimators: int = 50, tolerance: float = 0.0):
+    """
+    Continue training the production model on new data and promote it if
+    it does not regress
+    
+    The production model gets up to n_estimators more boosting iterations
+    fitted on the new rows, encoded with its saved feature pipeline. It is
+    promoted through update_model (backup, atomic swap, rotation) only if
+    its RMSE on the holdout is no worse than the current model's, within
+    tolerance.
+    
+    Args:
+        new_data_path: CSV of new sales, in the training data format
+        holdout_path: CSV to compare the models on. Defaults to 20% of the
+            new data, which is then not used for training
+        n_estimators: Maximum number of boosting iterations to add
+        tolerance: Relative RMSE increase still accepted, e.g. 0.01 for 1%
+    """
+    # Imported here rather than at the top: the API imports this module for
+    # rollback_model, and should not pay for training dependencies at startup
+    import copy
+    import numpy as np
+    from sklearn.metrics import mean_squared_error
+    from sklearn.model_selection import train_test_split
+    
+    from dataset_cache import load_dataset
+    from preprocessing import preprocess_data
+    from model import HousePriceModel
+    
+    try:
+        production = HousePriceModel.load_model(PRODUCTION_MODEL_PATH)
+        if production.feature_pipeline is None:
+            return False, (f"{PRODUCTION_MODEL_PATH} has no saved feature pipeline; "
+                           "retrain it with train.py before updating incrementally")
+        
+        X, y = preprocess_data(load_dataset(new_data_path), production.feature_pipeline, fit=False)
+        if holdout_path:
+            X_holdout, y_holdout = preprocess_data(
+                load_dataset(holdout_path), production.feature_pipeline, fit=False
+            )
+        else:
+            X, X_holdout, y, y_holdout = train_test_split(X, y, test_size=0.2, random_state=42)
+        logger.info(f"Continuing training on {len(X)} rows, holdout of {len(X_holdout)} rows")
+        
+        candidate = copy.deepcopy(production)
+        candidate.continue_training(X, y, n_estimators)
+        
+        current_rmse = np.sqrt(mean_squared_error(y_holdout, production.predict(X_holdout)))
+        candidate_rmse = np.sqrt(mean_squared_error(y_holdout, candidate.predict(X_holdout)))
+        logger.info(f"Holdout RMSE: current {current_rmse:.2f}, updated {candidate_rmse:.2f}")
+        if candidate_rmse > current_rmse * (1 + tolerance):
+            return False, (f"Updated model not promoted: holdout RMSE {candidate_rmse:.2f} "
+                           f"vs {current_rmse:.2f} for the current model")
+        
+        # Not a .joblib name, so a service following the models directory
+        # never picks up the staged file
+        staging_path = os.path.join(MODELS_DIR, 'incremental.joblib.tmp')
+        candidate.save_model(staging_path)
+        try:
+            success, message = update_model(
+                staging_path,
+                metrics={'rmse': candidate_rmse, 'holdout_rows': len(X_holdout)},
+                source=f"incremental update on {os.path.basename(new_data_path)}"
+            )
+        finally:
+            os.remove(staging_path)
+        if not success:
+            return False, message
+        return True, (f"Model updated incrementally: holdout RMSE {current_rmse:.2f} "
+                      f"-> {candidate_rmse:.2f}")
+        
+    except Exception as e:
+        logger.error(f"Error updating model incrementally: {str(e)}")
+        return False, str(e)
+
 if __name__ == "__main__":
     import sys
-    if len(sys.argv) != 2:
-        print("Usage: python update_model.py <path_to_new_model>")
+    # Only when run as a script: configured at import time, it would win
+    # over the logging format of the API that imports this module
+    logging.basicConfig(level=logging.INFO)
+    incremental = len(sys.argv) > 1 and sys.argv[1] == '--incremental'
+    if len(sys.argv) not in ((3, 4) if incremental else (2,)):
+        print("Usage: python update_model.py <path_to_new_model> | --rollback "
+              "| --incremental <new_data.csv> [<holdout.csv>]")
         sys.exit(1)
     
-    success, message = update_model(sys.argv[1])
+    if sys.argv[1] == '--rollback':
+        success, message = rollback_model()
+    elif incremental:
+        success, message = incremental_update(sys.argv[2], sys.argv[3] if len(sys.argv) == 4 else None)
+    else:
+        success, message = update_model(sys.argv[1])
     if not success:
         sys.exit(1)
     print(message) 
\ No newline at end of file
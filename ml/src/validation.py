@@ -0,0 +1,158 @@
+import math
+from collections import namedtuple
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+# One input field: Python type, description, numeric bounds (None = unbounded)
+# and whether only whole numbers or halves are allowed
+FieldSpec = namedtuple('FieldSpec', ['type', 'description', 'gt', 'ge', 'le', 'half_step'])
+FieldSpec.__new__.__defaults__ = (None, None, None, False)
+
+# Schema of a prediction request, shared by the API request model and the
+# service. pincode is additionally checked to be PINCODE_LENGTH digits.
+FIELD_SPECS = {
+    'pincode': FieldSpec(str, "6-digit pincode of the area"),
+    'lotArea': FieldSpec(float, "Total lot area in square feet", gt=0),
+    'livingArea': FieldSpec(float, "Living area in square feet", gt=0),
+    'builtYear': FieldSpec(int, "Year the house was built", ge=1800, le=2024),
+    'floors': FieldSpec(float, "Number of floors", gt=0, half_step=True),
+    'bedrooms': FieldSpec(float, "Number of bedrooms", gt=0, half_step=True),
+    'bathrooms': FieldSpec(float, "Number of bathrooms", gt=0, half_step=True),
+    'condition': FieldSpec(int, "Condition rating (1-10)", ge=1, le=10)
+}
+
+PINCODE_LENGTH = 6
+
+_MISSING = object()
+
+def is_half_step(value: float) -> bool:
+    """True for whole numbers and numbers ending in .5"""
+    return (value * 2) % 1 == 0
+
+def _to_float(value: Any) -> float:
+    """float(value), or NaN for an integer too large for a float, so it fails the finite check"""
+    try:
+        return float(value)
+    except (OverflowError, TypeError):
+        return math.nan
+
+def _numeric_rules(name: str, spec: FieldSpec) -> List:
+    """(failure test, message) pairs; each test takes a float or a float array"""
+    rules = []
+    if spec.type is int:
+        rules.append((lambda x: x % 1 != 0, f"{name} must be a whole number"))
+    if spec.ge is not None and spec.le is not None:
+        rules.append((lambda x: (x < spec.ge) | (x > spec.le), f"{name} must be between {spec.ge} and {spec.le}"))
+    elif spec.ge is not None:
+        rules.append((lambda x: x < spec.ge, f"{name} must be at least {spec.ge}"))
+    elif spec.le is not None:
+        rules.append((lambda x: x > spec.le, f"{name} must be at most {spec.le}"))
+    if spec.gt is not None:
+        rules.append((lambda x: x <= spec.gt, f"{name} must be greater than {spec.gt}"))
+    if spec.half_step:
+        rules.append((lambda x: (x * 2) % 1 != 0, f"{name} must be a whole number or end in .5"))
+    return rules
+
+NUMERIC_RULES = {
+    name: _numeric_rules(name, spec)
+    for name, spec in FIELD_SPECS.items() if spec.type is not str
+}
+
+def validate_records(records: List[Any]) -> List[Optional[str]]:
+    """
+    Validate a batch of inputs against FIELD_SPECS, one field at a time
+
+    Each field's values are pulled out of the records once, then all rules
+    are checked for the whole column with NumPy masks; only rows that fail
+    are visited individually to collect their messages.
+
+    Args:
+        records (list): Input dictionaries
+
+    Returns:
+        list: None for a valid record, else its error messages joined by
+            "; ", in input order
+    """
+    n = len(records)
+    errors = [[] for _ in range(n)]
+    is_dict = np.fromiter((isinstance(r, dict) for r in records), dtype=bool, count=n)
+    for i in np.flatnonzero(~is_dict):
+        errors[i].append("each item must be an object of input features")
+
+    def flag(mask, message):
+        for i in np.flatnonzero(mask):
+            errors[i].append(message)
+
+    for name, spec in FIELD_SPECS.items():
+        values = [r.get(name, _MISSING) if ok else None for r, ok in zip(records, is_dict)]
+        missing = np.fromiter((v is _MISSING or v is None for v in values), dtype=bool, count=n) & is_dict
+        flag(missing, f"Missing required field: {name}")
+
+        if spec.type is str:
+            is_str = np.fromiter((type(v) is str for v in values), dtype=bool, count=n)
+            flag(is_dict & ~missing & ~is_str, f"Invalid type for {name}. Expected a string")
+            text = np.array([v if type(v) is str else '' for v in values], dtype=str)
+            if name == 'pincode':
+                valid = (np.char.str_len(text) == PINCODE_LENGTH) & np.char.isdigit(text)
+                flag(is_str & ~valid, f"{name} must be a {PINCODE_LENGTH}-digit number")
+            continue
+
+        # bool is an int subclass, but never a valid count or measurement
+        is_number = np.fromiter((type(v) in (int, float) for v in values), dtype=bool, count=n)
+        flag(is_dict & ~missing & ~is_number, f"Invalid type for {name}. Expected a number")
+        x = np.fromiter((_to_float(v) if ok else 0.0 for v, ok in zip(values, is_number)), dtype=float, count=n)
+
+        finite = np.isfinite(x)
+        flag(is_number & ~finite, f"{name} must be a finite number")
+        checked = is_number & finite
+        for fails, message in NUMERIC_RULES[name]:
+            flag(checked & fails(x), message)
+
+    return ['; '.join(messages) if messages else None for messages in errors]
+
+def record_errors(data: Any) -> List[str]:
+    """
+    Check a single input with the same rules and messages as validate_records
+
+    Plain Python, much cheaper than NumPy for one record.
+
+    Args:
+        data (dict): Input features
+
+    Returns:
+        list: Error messages, empty if the input is valid
+    """
+    if not isinstance(data, dict):
+        return ["each item must be an object of input features"]
+
+    errors = []
+    for name, spec in FIELD_SPECS.items():
+        value = data.get(name)
+        if value is None:
+            errors.append(f"Missing required field: {name}")
+        elif spec.type is str:
+            if type(value) is not str:
+                errors.append(f"Invalid type for {name}. Expected a string")
+            elif name == 'pincode' and (len(value) != PINCODE_LENGTH or not value.isdigit()):
+                errors.append(f"{name} must be a {PINCODE_LENGTH}-digit number")
+        elif type(value) not in (int, float):
+            errors.append(f"Invalid type for {name}. Expected a number")
+        elif not math.isfinite(_to_float(value)):
+            errors.append(f"{name} must be a finite number")
+        else:
+            errors.extend(message for fails, message in NUMERIC_RULES[name] if fails(float(value)))
+    return errors
+
+def validate_record(data: Dict):
+    """
+    Validate a single input
+
+    Args:
+        data (dict): Input features
+
+    Raises:
+        ValueError: With every problem found, if the input is invalid
+    """
+    errors = record_errors(data)
+    if errors:
+        raise ValueError('; '.join(errors))